@@ -0,0 +1,59 @@
+"""
+Request timing for the Todo API
+
+TimingMiddleware times every request per route, adds a Server-Timing
+header with total and database time, and feeds the request histogram
+served at /metrics alongside database.statement_latency.
+"""
+
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from database import query_totals
+from metrics import LatencyMetric
+
+# Per-endpoint timings, keyed by method and route template; 5xx count as errors
+request_latency = LatencyMetric(
+    "todo_api_request_duration_seconds", "Todo API request latency", ["method", "route"]
+)
+
+def route_label(scope) -> str:
+    """The matched route template, e.g. /todos/{todo_id}, so ids do not become labels"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class TimingMiddleware:
+    """ASGI middleware adding Server-Timing and recording request latency"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        totals = [0.0, 0]
+        token = query_totals.set(totals)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'app;dur={elapsed_ms:.2f}, db;dur={totals[0] * 1000:.2f};desc="statements: {totals[1]}"'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_totals.reset(token)
+            request_latency.observe(
+                (scope["method"], route_label(scope)), time.perf_counter() - start, status >= 500
+            )
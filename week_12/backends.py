@@ -0,0 +1,290 @@
+"""
+Backends used by the MCP server to reach Todo data
+
+- HttpTodoBackend calls the FastAPI app over HTTP (default)
+- DirectTodoBackend calls the repository layer in-process over SessionLocal
+
+Select one with TODO_BACKEND=http|direct.
+"""
+
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import asyncio
+import httpx
+import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+# Which backend the MCP tools use: "http" or "direct"
+TODO_BACKEND = os.getenv("TODO_BACKEND", "http")
+
+# Base URL for the Todo API
+TODO_API_BASE = os.getenv("TODO_API_BASE", "http://localhost:8000")
+
+# Connection pool and timeout settings for the shared HTTP client
+TODO_API_TIMEOUT = float(os.getenv("TODO_API_TIMEOUT", "10.0"))
+TODO_API_CONNECT_TIMEOUT = float(os.getenv("TODO_API_CONNECT_TIMEOUT", "5.0"))
+TODO_API_MAX_CONNECTIONS = int(os.getenv("TODO_API_MAX_CONNECTIONS", "100"))
+TODO_API_MAX_KEEPALIVE = int(os.getenv("TODO_API_MAX_KEEPALIVE", "20"))
+TODO_API_KEEPALIVE_EXPIRY = float(os.getenv("TODO_API_KEEPALIVE_EXPIRY", "30.0"))
+
+# How many GET bodies the HTTP backend keeps for If-None-Match revalidation
+TODO_API_ETAG_CACHE_SIZE = int(os.getenv("TODO_API_ETAG_CACHE_SIZE", "256"))
+
+# Shared client state: one keep-alive pool for the whole server process
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_users = 0
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create an HTTP client with a keep-alive connection pool for the Todo API"""
+    return httpx.AsyncClient(
+        base_url=TODO_API_BASE,
+        limits=httpx.Limits(
+            max_connections=TODO_API_MAX_CONNECTIONS,
+            max_keepalive_connections=TODO_API_MAX_KEEPALIVE,
+            keepalive_expiry=TODO_API_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(TODO_API_TIMEOUT, connect=TODO_API_CONNECT_TIMEOUT)
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+@asynccontextmanager
+async def shared_http_client() -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Hold a reference to the shared HTTP client
+
+    The client is closed when the last holder exits, so concurrent HTTP
+    sessions share one pool and the process shuts down cleanly.
+    """
+    global _http_client, _http_client_users
+    _http_client_users += 1
+    try:
+        yield get_http_client()
+    finally:
+        _http_client_users -= 1
+        if _http_client_users == 0 and _http_client is not None:
+            client, _http_client = _http_client, None
+            await client.aclose()
+
+class HttpTodoBackend:
+    """
+    Todo backend that talks to the FastAPI app over HTTP
+
+    GET responses are kept with their ETag and revalidated with
+    If-None-Match, so repeated reads of unchanged data cost a 304.
+    """
+
+    name = "http"
+
+    def __init__(self):
+        # (path, params) -> (etag, body, next_cursor), least recently used first
+        self._etag_cache: OrderedDict = OrderedDict()
+
+    async def _conditional_get(self, path: str, params: Optional[Dict] = None) -> Tuple[object, Optional[str]]:
+        """GET path, reusing the cached body on 304; returns (body, next_cursor)"""
+        key = (path, tuple(sorted((params or {}).items())))
+        cached = self._etag_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+
+        response = await get_http_client().get(path, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            self._etag_cache.move_to_end(key)
+            return cached[1], cached[2]
+        response.raise_for_status()
+
+        body = response.json()
+        next_cursor = response.headers.get("X-Next-Cursor")
+        etag = response.headers.get("ETag")
+        if etag and TODO_API_ETAG_CACHE_SIZE > 0:
+            self._etag_cache[key] = (etag, body, next_cursor)
+            self._etag_cache.move_to_end(key)
+            while len(self._etag_cache) > TODO_API_ETAG_CACHE_SIZE:
+                self._etag_cache.popitem(last=False)
+        return body, next_cursor
+
+    async def list_todos(self, params: Dict) -> Tuple[List[Dict], Optional[str]]:
+        return await self._conditional_get("/todos", params)
+
+    async def search_todos(self, params: Dict) -> List[Dict]:
+        todos, _ = await self._conditional_get("/todos/search", params)
+        return todos
+
+    async def create_todo(self, todo_data: Dict) -> Dict:
+        response = await get_http_client().post("/todos", json=todo_data)
+        response.raise_for_status()
+        return response.json()
+
+    async def update_todo(self, todo_id: int, update_data: Dict) -> Dict:
+        response = await get_http_client().patch(f"/todos/{todo_id}", json=update_data)
+        response.raise_for_status()
+        return response.json()
+
+    async def delete_todo(self, todo_id: int) -> None:
+        response = await get_http_client().delete(f"/todos/{todo_id}")
+        response.raise_for_status()
+
+    async def complete_todo(self, todo_id: int) -> Dict:
+        response = await get_http_client().post(f"/todos/{todo_id}/complete")
+        response.raise_for_status()
+        return response.json()
+
+    async def create_todos(self, todos: List[Dict]) -> List[Dict]:
+        response = await get_http_client().post("/todos/bulk", json={"todos": todos})
+        response.raise_for_status()
+        return response.json()
+
+    async def update_todos(self, updates: List[Dict]) -> List[Dict]:
+        response = await get_http_client().patch("/todos/bulk", json={"updates": updates})
+        response.raise_for_status()
+        return response.json()
+
+    async def delete_todos(self, todo_ids: List[int]) -> int:
+        response = await get_http_client().request("DELETE", "/todos/bulk", json={"ids": todo_ids})
+        response.raise_for_status()
+        return response.json()["deleted"]
+
+    async def get_stats(self) -> Dict:
+        stats, _ = await self._conditional_get("/todos/stats/summary")
+        return stats
+
+    async def get_overview(self, limit: int) -> Dict:
+        overview, _ = await self._conditional_get("/todos/overview", {"limit": limit})
+        return overview
+
+    async def list_changes(self, since: int, limit: int) -> Dict:
+        response = await get_http_client().get("/todos/changes", params={"since": since, "limit": limit})
+        if response.status_code == 410:
+            # Same error the direct backend raises, with the API's explanation
+            raise LookupError(response.json()["detail"]["message"])
+        response.raise_for_status()
+        return response.json()
+
+    async def export_todos(self, params: Dict) -> str:
+        # Decoded chunk by chunk as the API streams it
+        async with get_http_client().stream("GET", "/todos/export", params=params) as response:
+            response.raise_for_status()
+            return "".join([text async for text in response.aiter_text()])
+
+class DirectTodoBackend:
+    """
+    Todo backend that calls the repository layer in-process
+
+    Skips HTTP framing and the extra JSON round-trip when the MCP server
+    runs next to the database. Blocking SQLAlchemy calls run in a worker
+    thread so the event loop stays responsive.
+    """
+
+    name = "direct"
+
+    def __init__(self):
+        # Imported lazily so the HTTP backend never opens the database
+        import export
+        import repository
+        from database import SessionLocal
+        from schemas import TodoCreate, TodoUpdate, TodoBulkCreate, TodoBulkUpdate, TodoBulkDelete
+
+        self._export = export
+        self._repository = repository
+        self._session_factory = SessionLocal
+        self._todo_create = TodoCreate
+        self._todo_update = TodoUpdate
+        self._todo_bulk_create = TodoBulkCreate
+        self._todo_bulk_update = TodoBulkUpdate
+        self._todo_bulk_delete = TodoBulkDelete
+
+    async def _run(self, func, *args, **kwargs):
+        def call():
+            db = self._session_factory()
+            try:
+                return func(db, *args, **kwargs)
+            finally:
+                db.close()
+
+        return await asyncio.to_thread(call)
+
+    def _serialize(self, todo, todo_id: int) -> Dict:
+        if not todo:
+            raise LookupError(f"Todo {todo_id} not found")
+        return self._repository.serialize_todo(todo)
+
+    async def list_todos(self, params: Dict) -> Tuple[List[Dict], Optional[str]]:
+        repo = self._repository
+
+        return await self._run(lambda db: repo.list_todo_rows(db, **params))
+
+    async def search_todos(self, params: Dict) -> List[Dict]:
+        params = dict(params)
+        query = params.pop("q")
+        return await self._run(self._repository.search_todos, query, **params)
+
+    async def create_todo(self, todo_data: Dict) -> Dict:
+        todo = self._todo_create(**todo_data)
+        repo = self._repository
+        return await self._run(lambda db: repo.serialize_todo(repo.create_todo(db, todo)))
+
+    async def update_todo(self, todo_id: int, update_data: Dict) -> Dict:
+        todo_update = self._todo_update(**update_data)
+        repo = self._repository
+        return await self._run(
+            lambda db: self._serialize(repo.update_todo(db, todo_id, todo_update), todo_id)
+        )
+
+    async def delete_todo(self, todo_id: int) -> None:
+        if not await self._run(self._repository.delete_todo, todo_id):
+            raise LookupError(f"Todo {todo_id} not found")
+
+    async def complete_todo(self, todo_id: int) -> Dict:
+        repo = self._repository
+        return await self._run(
+            lambda db: self._serialize(repo.complete_todo(db, todo_id), todo_id)
+        )
+
+    async def create_todos(self, todos: List[Dict]) -> List[Dict]:
+        bulk = self._todo_bulk_create(todos=todos)
+        return await self._run(self._repository.create_todos, bulk.todos)
+
+    async def update_todos(self, updates: List[Dict]) -> List[Dict]:
+        bulk = self._todo_bulk_update(updates=updates)
+        return await self._run(self._repository.update_todos, bulk.updates)
+
+    async def delete_todos(self, todo_ids: List[int]) -> int:
+        bulk = self._todo_bulk_delete(ids=todo_ids)
+        return await self._run(self._repository.delete_todos, bulk.ids)
+
+    async def get_stats(self) -> Dict:
+        return await self._run(self._repository.get_stats)
+
+    async def get_overview(self, limit: int) -> Dict:
+        return await self._run(self._repository.get_overview, limit)
+
+    async def list_changes(self, since: int, limit: int) -> Dict:
+        return await self._run(self._repository.list_changes, since=since, limit=limit)
+
+    async def export_todos(self, params: Dict) -> str:
+        params = dict(params)
+        format = params.pop("format", "ndjson")
+        columns = self._repository.parse_fields(params.pop("fields", None))
+
+        def read(db):
+            batches = self._repository.iter_todo_batches(db, columns, **params)
+            return b"".join(self._export.export_chunks(batches, columns, format)).decode()
+
+        return await self._run(read)
+
+BACKENDS = {
+    "http": HttpTodoBackend,
+    "direct": DirectTodoBackend,
+}
+
+def create_backend(mode: str = TODO_BACKEND):
+    """Create the backend named by mode ("http" or "direct")"""
+    try:
+        backend_class = BACKENDS[mode]
+    except KeyError:
+        raise ValueError(f"Unknown TODO_BACKEND {mode!r}, expected one of {sorted(BACKENDS)}")
+    return backend_class()
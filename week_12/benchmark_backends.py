@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark the MCP server backends
+Compares per-call latency of the HTTP backend (loopback FastAPI) with the
+in-process direct backend on a throwaway SQLite database
+
+Usage:
+    python benchmark_backends.py [--calls 500] [--rows 200]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+
+# Point the app at a throwaway database, deleted on exit, before anything imports database.py
+from temp_database import use_temporary_database
+
+use_temporary_database("bench")
+
+import uvicorn
+
+import backends
+from main import app
+from database import SessionLocal, Todo
+
+PORT = 8765
+
+def seed(rows: int):
+    """Insert rows todos for list queries to return"""
+    db = SessionLocal()
+    try:
+        db.query(Todo).delete()
+        priorities = ["low", "medium", "high"]
+        for i in range(rows):
+            db.add(Todo(
+                title=f"Benchmark todo {i}",
+                description="Seeded for backend benchmark",
+                priority=priorities[i % 3],
+                completed=i % 4 == 0
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+def start_api_server() -> uvicorn.Server:
+    """Run the FastAPI app on a background thread"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def time_calls(label: str, calls: int, func) -> dict:
+    """Call func sequentially and return latency stats in milliseconds"""
+    # Warm up connections, statement caches and thread pools
+    for _ in range(10):
+        await func()
+
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        "operation": label,
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+    }
+
+async def benchmark_backend(mode: str, calls: int) -> list:
+    backend = backends.create_backend(mode)
+    results = []
+
+    async with backends.shared_http_client():
+        results.append(await time_calls("get_todos(limit=10)", calls,
+                                        lambda: backend.list_todos({"limit": 10})))
+        results.append(await time_calls("get_todos(limit=100)", calls,
+                                        lambda: backend.list_todos({"limit": 100})))
+        results.append(await time_calls("get_todo_stats", calls, backend.get_stats))
+
+        created = await backend.create_todo({"title": "Benchmark update target"})
+        results.append(await time_calls("update_todo", calls,
+                                        lambda: backend.update_todo(created["id"], {"priority": "high"})))
+        await backend.delete_todo(created["id"])
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500, help="Calls per operation")
+    parser.add_argument("--rows", type=int, default=200, help="Todos to seed")
+    args = parser.parse_args()
+
+    seed(args.rows)
+    server = start_api_server()
+    backends.TODO_API_BASE = f"http://127.0.0.1:{PORT}"
+
+    try:
+        print(f"Per-call latency over {args.calls} calls ({args.rows} todos)\n")
+        print(f"{'backend':<8} {'operation':<22} {'mean':>9} {'p50':>9} {'p95':>9}")
+        for mode in ("http", "direct"):
+            for row in asyncio.run(benchmark_backend(mode, args.calls)):
+                print(f"{mode:<8} {row['operation']:<22} "
+                      f"{row['mean_ms']:>7.3f}ms {row['p50_ms']:>7.3f}ms {row['p95_ms']:>7.3f}ms")
+    finally:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    sys.exit(main())
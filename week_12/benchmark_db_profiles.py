@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark SQLite engine profiles under concurrent writers
+Runs several processes (like uvicorn workers) that create and complete
+todos against one database file, once per TODO_DB_PROFILE, and reports
+write throughput and "database is locked" errors
+
+Usage:
+    python benchmark_db_profiles.py [--workers 4] [--seconds 5] [--readers 2]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+from temp_database import temporary_database
+
+def init_database(db_url: str, profile: str):
+    """Create the schema before the workers start, so migrations are not timed"""
+    os.environ["TODO_DATABASE_URL"] = db_url
+    os.environ["TODO_DB_PROFILE"] = profile
+    import database  # noqa: F401
+
+def worker(db_url: str, profile: str, role: str, seconds: float, results):
+    """Write (or read) in a loop until the deadline, then report counts"""
+    os.environ["TODO_DATABASE_URL"] = db_url
+    os.environ["TODO_DB_PROFILE"] = profile
+
+    from sqlalchemy.exc import OperationalError
+
+    import repository
+    from database import SessionLocal
+    from schemas import TodoCreate
+
+    operations = 0
+    locked = 0
+    db = SessionLocal()
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                if role == "writer":
+                    todo = repository.create_todo(db, TodoCreate(title="Benchmark write", priority="high"))
+                    repository.complete_todo(db, todo.id)
+                    operations += 2
+                else:
+                    repository.list_todos(db, limit=50, completed=False)
+                    repository.get_stats(db)
+                    operations += 2
+            except OperationalError as e:
+                db.rollback()
+                if "locked" not in str(e):
+                    raise
+                locked += 1
+    finally:
+        db.close()
+
+    results.put((role, operations, locked))
+
+def run_profile(profile: str, workers: int, readers: int, seconds: float) -> dict:
+    with temporary_database(f"profile-{profile}") as db_url:
+        ctx = multiprocessing.get_context("spawn")
+        setup = ctx.Process(target=init_database, args=(db_url, profile))
+        setup.start()
+        setup.join()
+
+        results = ctx.Queue()
+        roles = ["writer"] * workers + ["reader"] * readers
+        processes = [
+            ctx.Process(target=worker, args=(db_url, profile, role, seconds, results))
+            for role in roles
+        ]
+        for process in processes:
+            process.start()
+        totals = {"writer": [0, 0], "reader": [0, 0]}
+        for _ in processes:
+            role, operations, locked = results.get()
+            totals[role][0] += operations
+            totals[role][1] += locked
+        for process in processes:
+            process.join()
+
+    return {
+        "profile": profile,
+        "writes_per_sec": totals["writer"][0] / seconds,
+        "reads_per_sec": totals["reader"][0] / seconds,
+        "locked_errors": totals["writer"][1] + totals["reader"][1],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent writer processes")
+    parser.add_argument("--readers", type=int, default=2, help="Concurrent reader processes")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per profile")
+    args = parser.parse_args()
+
+    print(f"{args.workers} writers + {args.readers} readers, {args.seconds:.0f}s per profile\n")
+    print(f"{'profile':<8} {'writes/s':>10} {'reads/s':>10} {'locked':>8}")
+    for profile in ("default", "tuned"):
+        row = run_profile(profile, args.workers, args.readers, args.seconds)
+        print(f"{row['profile']:<8} {row['writes_per_sec']:>10.0f} "
+              f"{row['reads_per_sec']:>10.0f} {row['locked_errors']:>8}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Memory ceiling check for the streaming export
+Seeds N todos (1 million by default), starts the API under uvicorn and
+reads GET /todos/export to the end in each format while sampling the
+server's anonymous resident memory (RssAnon, so pages of the memory-mapped
+database file do not count). Then runs the same export generator in-process
+under tracemalloc. Fails if a row is missing, if server memory grows by more
+than --max-growth-mb over the idle server, or if Python allocations peak
+above --max-traced-mb.
+
+A full scan fills the connection's SQLite page cache once the table is
+larger than the mmap window, so the default ceiling is that cache
+(TODO_DB_CACHE_SIZE) plus 32 MiB. Neither part depends on the row count.
+
+Usage:
+    python benchmark_export.py [--rows 1000000] [--formats ndjson,csv]
+                               [--max-growth-mb 96] [--max-traced-mb 16]
+                               [--database-url sqlite:////tmp/export.db --skip-seed]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import httpx
+
+from benchmark_gateway import start_server, stop_server
+from temp_database import temporary_database
+
+def rss_anon_mb(pid: int) -> float:
+    """Anonymous resident memory of a process in MiB, from /proc"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("RssAnon not reported; this check needs Linux")
+
+class MemorySampler(threading.Thread):
+    """Record the highest RssAnon of a process until stopped"""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_mb = rss_anon_mb(pid)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, rss_anon_mb(self.pid))
+
+    def stop(self) -> float:
+        self._stop_event.set()
+        self.join()
+        return self.peak_mb
+
+def page_cache_mb() -> float:
+    """Size of one connection's SQLite page cache under the current profile, in MiB"""
+    from database import SQLITE_PROFILES, TODO_DB_PROFILE
+
+    # Negative cache_size is in KiB, positive in pages; SQLite's default is -2000
+    cache_size = SQLITE_PROFILES[TODO_DB_PROFILE].get("cache_size", -2000)
+    return -cache_size / 1024 if cache_size < 0 else cache_size * 4096 / 2**20
+
+def count_rows(body_lines: int, format: str) -> int:
+    return body_lines - 1 if format == "csv" else body_lines
+
+def stream_export(base_url: str, format: str, pid: int) -> dict:
+    """Read the whole export over HTTP, tracking server memory while it streams"""
+    baseline = rss_anon_mb(pid)
+    sampler = MemorySampler(pid)
+    sampler.start()
+    lines = size = 0
+    first_byte = None
+    start = time.perf_counter()
+    try:
+        with httpx.stream("GET", f"{base_url}/todos/export", params={"format": format}, timeout=60) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+                lines += chunk.count(b"\n")
+                size += len(chunk)
+    finally:
+        peak = sampler.stop()
+    seconds = time.perf_counter() - start
+    return {
+        "rows": count_rows(lines, format),
+        "mb": size / 2**20,
+        "seconds": seconds,
+        "first_byte_ms": (first_byte or seconds) * 1000,
+        "baseline_mb": baseline,
+        "growth_mb": peak - baseline,
+    }
+
+def traced_export(format: str) -> dict:
+    """Run main.export_stream in-process and report the tracemalloc peak"""
+    import main
+    import repository
+
+    tracemalloc.start()
+    try:
+        lines = 0
+        start = time.perf_counter()
+        for chunk in main.export_stream(format, repository.TODO_COLUMNS, {}):
+            lines += chunk.count(b"\n")
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"rows": count_rows(lines, format), "seconds": seconds, "traced_peak_mb": peak / 2**20}
+
+def run_benchmark(args):
+    """Seed the database, then run each export over HTTP and in-process"""
+    if not args.skip_seed:
+        import seed_data
+
+        start = time.perf_counter()
+        seed_data.seed_todos(args.rows, seed=args.seed)
+        print(f"Seeded {args.rows} todos in {time.perf_counter() - start:.0f}s")
+
+    if args.max_growth_mb is None:
+        args.max_growth_mb = page_cache_mb() + 32
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    formats = args.formats.split(",")
+    failures = []
+
+    api = start_server("main", args.port, 1, os.environ.copy())
+    try:
+        expected = httpx.get(f"{base_url}/todos/stats/summary").json()["total"]
+        print(f"\nStreaming {expected} todos from GET /todos/export (server RssAnon ceiling "
+              f"+{args.max_growth_mb:.0f} MiB)\n")
+        print(f"{'format':<8} {'rows':>9} {'MiB':>8} {'seconds':>8} {'rows/s':>9} {'1st byte':>9} "
+              f"{'idle RSS':>9} {'growth':>8}")
+        for format in formats:
+            row = stream_export(base_url, format, api.pid)
+            print(f"{format:<8} {row['rows']:>9} {row['mb']:>8.0f} {row['seconds']:>8.1f} "
+                  f"{row['rows'] / row['seconds']:>9.0f} {row['first_byte_ms']:>7.1f}ms "
+                  f"{row['baseline_mb']:>7.1f}Mi {row['growth_mb']:>+6.1f}Mi")
+            if row["rows"] != expected:
+                failures.append(f"{format} over HTTP: {row['rows']} rows, expected {expected}")
+            if row["growth_mb"] > args.max_growth_mb:
+                failures.append(f"{format} over HTTP: server grew {row['growth_mb']:.1f} MiB, "
+                                f"ceiling {args.max_growth_mb:.0f} MiB")
+    finally:
+        stop_server(api)
+
+    if not args.skip_traced:
+        print(f"\nIn-process export under tracemalloc (ceiling {args.max_traced_mb:.0f} MiB)\n")
+        print(f"{'format':<8} {'rows':>9} {'seconds':>8} {'peak':>9}")
+        for format in formats:
+            row = traced_export(format)
+            print(f"{format:<8} {row['rows']:>9} {row['seconds']:>8.1f} {row['traced_peak_mb']:>7.2f}Mi")
+            if row["rows"] != expected:
+                failures.append(f"{format} in-process: {row['rows']} rows, expected {expected}")
+            if row["traced_peak_mb"] > args.max_traced_mb:
+                failures.append(f"{format} in-process: traced peak {row['traced_peak_mb']:.1f} MiB, "
+                                f"ceiling {args.max_traced_mb:.0f} MiB")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("\nok: every row exported within the memory ceilings")
+    return 1 if failures else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Todos to seed")
+    parser.add_argument("--formats", default="ndjson,csv", help="Comma-separated export formats")
+    parser.add_argument("--max-growth-mb", type=float,
+                        help="Largest allowed server RssAnon growth while streaming "
+                             "(default: the SQLite page cache + 32 MiB)")
+    parser.add_argument("--max-traced-mb", type=float, default=16,
+                        help="Largest allowed tracemalloc peak for the in-process export")
+    parser.add_argument("--skip-traced", action="store_true", help="Skip the slower in-process tracemalloc run")
+    parser.add_argument("--port", type=int, default=8768, help="Port for the API subprocess")
+    parser.add_argument("--database-url", help="Database to seed and use (default: a temporary file, deleted afterwards)")
+    parser.add_argument("--skip-seed", action="store_true", help="Export the database as it is")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated todos")
+    args = parser.parse_args()
+
+    # The API subprocess and the in-process export read the same database
+    with temporary_database("export", args.database_url):
+        return run_benchmark(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Concurrent tool-call benchmark for the MCP HTTP gateway
+Seeds N todos, starts the FastAPI app and mcp_server_http.py under uvicorn
+with each requested worker count, and fires JSON-RPC tools/call requests
+from many concurrent clients. Reports tool calls/sec, p50/p95/p99 latency
+and how many calls the per-tool limits turned away.
+
+The gateway runs stateless, so by default each call is a single POST with
+no initialize handshake. --client fastmcp makes the calls through one
+connected fastmcp Client per simulated client instead. A client whose call
+is rejected waits --backoff seconds before its next call.
+
+Usage:
+    python benchmark_gateway.py [--rows 10000] [--workers 1,2,4] [--concurrency 16,64]
+                                [--duration 5] [--tools get_todos,get_todo_stats,search_todos]
+                                [--client raw|fastmcp]
+                                [--output gateway_results.json]
+"""
+
+import argparse
+import asyncio
+from contextlib import AsyncExitStack
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmark_load import HERE, PRIORITIES, SEARCH_TERMS, git_commit, summarize
+from temp_database import temporary_database
+
+def tool_arguments(tool: str, rng: random.Random) -> dict:
+    """Arguments for one call to a read tool"""
+    if tool == "get_todos":
+        return {"limit": 20, "priority": rng.choice(PRIORITIES)}
+    if tool == "search_todos":
+        return {"query": rng.choice(SEARCH_TERMS), "limit": 10}
+    if tool == "get_todo":
+        return {"todo_id": rng.randint(1, 1000)}
+    return {}
+
+def start_server(module: str, port: int, workers: int, env: dict) -> subprocess.Popen:
+    """Start uvicorn module:app in a subprocess and wait until /health answers"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=HERE,
+        env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn {module} exited before it started serving")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"uvicorn {module} did not start within 30s")
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    process.wait()
+
+def is_rejection(data) -> bool:
+    """Whether JSON-RPC error data is the gateway turning a call away at its limit"""
+    return isinstance(data, dict) and "retry_after" in data
+
+class RawCaller:
+    """Tool calls as single JSON-RPC POSTs, which the stateless gateway accepts"""
+
+    def __init__(self, client: httpx.AsyncClient, url: str):
+        self.client = client
+        self.url = url
+        self.request_id = 0
+
+    async def call(self, tool: str, arguments: dict) -> str:
+        self.request_id += 1
+        response = await self.client.post(self.url, json={
+            "jsonrpc": "2.0",
+            "id": self.request_id,
+            "method": "tools/call",
+            "params": {"name": tool, "arguments": arguments},
+        })
+        response.raise_for_status()
+        message = response.json()
+        if "error" in message:
+            return "rejected" if is_rejection(message["error"].get("data")) else "error"
+        return "error" if message["result"].get("isError") else "ok"
+
+class FastMcpCaller:
+    """Tool calls through a connected fastmcp Client, as a real MCP client makes them"""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def call(self, tool: str, arguments: dict) -> str:
+        from mcp import McpError
+
+        try:
+            result = await self.client.call_tool_mcp(tool, arguments)
+        except McpError as e:
+            return "rejected" if is_rejection(e.error.data) else "error"
+        return "error" if result.isError else "ok"
+
+async def run_calls(url: str, concurrency: int, args) -> dict:
+    """Call tools from concurrency clients for the duration and summarize"""
+    tools = args.tools.split(",")
+    samples = []
+    counts = {"errors": 0, "rejected": 0}
+
+    async with AsyncExitStack() as stack:
+        if args.client == "fastmcp":
+            from fastmcp import Client
+
+            callers = [FastMcpCaller(await stack.enter_async_context(Client(url, timeout=30)))
+                       for _ in range(concurrency)]
+        else:
+            headers = {"Accept": "application/json, text/event-stream"}
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            client = await stack.enter_async_context(httpx.AsyncClient(limits=limits, timeout=30, headers=headers))
+            callers = [RawCaller(client, url) for _ in range(concurrency)]
+
+        async def worker(number: int, deadline: float, record: bool):
+            rng = random.Random(args.seed * 1000 + number)
+            while time.perf_counter() < deadline:
+                tool = rng.choice(tools)
+                start = time.perf_counter()
+                try:
+                    outcome = await callers[number].call(tool, tool_arguments(tool, rng))
+                except (httpx.HTTPError, ValueError, RuntimeError):
+                    outcome = "error"
+                if outcome == "rejected":
+                    if record:
+                        counts["rejected"] += 1
+                    await asyncio.sleep(args.backoff)
+                elif record:
+                    if outcome == "ok":
+                        samples.append((time.perf_counter() - start) * 1000)
+                    else:
+                        counts["errors"] += 1
+
+        async def run_phase(seconds: float, record: bool):
+            deadline = time.perf_counter() + seconds
+            await asyncio.gather(*(worker(i, deadline, record) for i in range(concurrency)))
+
+        await run_phase(args.warmup, record=False)
+        start = time.perf_counter()
+        await run_phase(args.duration, record=True)
+        elapsed = time.perf_counter() - start
+
+    return {**summarize(samples, counts["errors"], elapsed), "rejected": counts["rejected"]}
+
+def run_benchmark(args):
+    """Seed the database, then measure each worker count and concurrency"""
+    os.environ.setdefault("TODO_API_BASE", f"http://127.0.0.1:{args.api_port}")
+
+    import seed_data
+
+    seed_data.seed_todos(args.rows, seed=args.seed)
+    print(f"Seeded {args.rows} todos; calling {args.tools} for {args.duration:.0f}s per run")
+
+    env = os.environ.copy()
+    gateway_env = {**env, "TODO_CACHE_TTL": args.cache_ttl}
+    needs_api = os.getenv("TODO_BACKEND", "http") == "http"
+    api = start_server("main", args.api_port, args.api_workers, env) if needs_api else None
+
+    url = f"http://127.0.0.1:{args.port}/mcp"
+    results = []
+    print(f"\n{'workers':>7} {'clients':>7} {'calls/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'rejected':>8} {'errors':>6}")
+    try:
+        for workers in map(int, args.workers.split(",")):
+            gateway = start_server("mcp_server_http", args.port, workers, gateway_env)
+            try:
+                for concurrency in map(int, args.concurrency.split(",")):
+                    row = asyncio.run(run_calls(url, concurrency, args))
+                    results.append({"workers": workers, "concurrency": concurrency, **row})
+                    print(f"{workers:>7} {concurrency:>7} {row['throughput_rps']:>9.0f} "
+                          f"{row['p50_ms']:>7.2f}ms {row['p95_ms']:>7.2f}ms {row['p99_ms']:>7.2f}ms "
+                          f"{row['rejected']:>8} {row['errors']:>6}")
+            finally:
+                stop_server(gateway)
+    finally:
+        if api:
+            stop_server(api)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "git_commit": git_commit(),
+                    "cpus": os.cpu_count(),
+                    "mcp_backend": os.getenv("TODO_BACKEND", "http"),
+                    "settings": vars(args),
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Todos to seed")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated gateway worker counts")
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn worker processes for the API")
+    parser.add_argument("--concurrency", default="16,64", help="Comma-separated concurrent client counts")
+    parser.add_argument("--duration", type=float, default=5.0, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Unmeasured seconds before each run")
+    parser.add_argument("--tools", default="get_todos,get_todo_stats,search_todos",
+                        help="Comma-separated tools to call, chosen at random")
+    parser.add_argument("--backoff", type=float, default=0.05, help="Seconds a client waits after a rejected call")
+    parser.add_argument("--client", choices=["raw", "fastmcp"], default="raw",
+                        help="Send raw JSON-RPC POSTs or call through fastmcp Clients")
+    parser.add_argument("--cache-ttl", default="0",
+                        help="TODO_CACHE_TTL for the gateway; 0 measures uncached calls")
+    parser.add_argument("--api-port", type=int, default=8766, help="Port for the API subprocess")
+    parser.add_argument("--port", type=int, default=8767, help="Port for the gateway subprocess")
+    parser.add_argument("--database-url", help="Database to seed and use (default: a new temporary file)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for data and workload")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    # The API and gateway subprocesses share one database
+    with temporary_database("gateway", args.database_url):
+        return run_benchmark(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Load-generation benchmark for the Todo API and MCP server
+Seeds N todos with seed_data.py, then drives a mixed read/write workload
+at a fixed concurrency against the FastAPI app (run by uvicorn in a
+subprocess) and through the MCP tools, and writes throughput and
+p50/p95/p99 latency per operation to a JSON results file. Pass an
+earlier results file as --baseline to print the change per operation.
+
+MCP tools are called in-process through a fastmcp Client unless
+--mcp-url points at a running MCP server.
+
+Usage:
+    python benchmark_load.py [--rows 100000] [--concurrency 16] [--duration 10]
+                             [--read-ratio 0.8] [--target api|mcp|both]
+                             [--output load_results.json] [--baseline old.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+from temp_database import temporary_database
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Relative weights of the operations within reads and within writes
+READ_OPERATIONS = {"list_todos": 50, "get_stats": 20, "search_todos": 20, "get_changes": 10}
+WRITE_OPERATIONS = {"create_todo": 40, "update_todo": 30, "complete_todo": 20, "delete_todo": 10}
+
+SEARCH_TERMS = ["documentation", "tests", "database", "meeting", "security", "dashboard", "backup"]
+PRIORITIES = ["low", "medium", "high"]
+
+def percentile(samples, fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+def summarize(samples, errors: int, seconds: float) -> dict:
+    samples = sorted(samples)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": len(samples) / seconds,
+        "mean_ms": sum(samples) / len(samples) if samples else 0.0,
+        "p50_ms": percentile(samples, 0.50),
+        "p95_ms": percentile(samples, 0.95),
+        "p99_ms": percentile(samples, 0.99),
+    }
+
+class ApiClient:
+    """Workload operations as FastAPI requests"""
+
+    def __init__(self, client: httpx.AsyncClient, changes_since: int = 0):
+        self.client = client
+        # Start of the change log; seeding replaces it, so older seqs are pruned
+        self.changes_since = changes_since
+
+    async def _call(self, method: str, path: str, **kwargs):
+        response = await self.client.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    async def list_todos(self, rng):
+        params = {"limit": 20}
+        if rng.random() < 0.5:
+            params["priority"] = rng.choice(PRIORITIES)
+        if rng.random() < 0.5:
+            params["completed"] = rng.random() < 0.3
+        await self._call("GET", "/todos", params=params)
+
+    async def get_stats(self, rng):
+        await self._call("GET", "/todos/stats/summary")
+
+    async def search_todos(self, rng):
+        await self._call("GET", "/todos/search", params={"q": rng.choice(SEARCH_TERMS), "limit": 10})
+
+    async def get_changes(self, rng):
+        since = self.changes_since + rng.randint(0, 1000)
+        await self._call("GET", "/todos/changes", params={"since": since, "limit": 50})
+
+    async def create_todo(self, rng):
+        todo = await self._call("POST", "/todos", json={
+            "title": f"Load test todo {rng.random():.6f}",
+            "description": "Created by benchmark_load.py",
+            "priority": rng.choice(PRIORITIES)
+        })
+        return todo["id"]
+
+    async def update_todo(self, rng, todo_id: int):
+        await self._call("PATCH", f"/todos/{todo_id}", json={"priority": rng.choice(PRIORITIES)})
+
+    async def complete_todo(self, rng, todo_id: int):
+        await self._call("POST", f"/todos/{todo_id}/complete")
+
+    async def delete_todo(self, rng, todo_id: int):
+        await self._call("DELETE", f"/todos/{todo_id}")
+
+class McpClient:
+    """Workload operations as MCP tool calls"""
+
+    def __init__(self, client, changes_since: int = 0):
+        self.client = client
+        self.changes_since = changes_since
+
+    async def _call(self, tool: str, arguments: dict):
+        result = await self.client.call_tool(tool, arguments)
+        return result.data
+
+    async def list_todos(self, rng):
+        arguments = {"limit": 20}
+        if rng.random() < 0.5:
+            arguments["priority"] = rng.choice(PRIORITIES)
+        if rng.random() < 0.5:
+            arguments["completed"] = rng.random() < 0.3
+        await self._call("get_todos", arguments)
+
+    async def get_stats(self, rng):
+        await self._call("get_todo_stats", {})
+
+    async def search_todos(self, rng):
+        await self._call("search_todos", {"query": rng.choice(SEARCH_TERMS), "limit": 10})
+
+    async def get_changes(self, rng):
+        since = self.changes_since + rng.randint(0, 1000)
+        await self._call("get_todo_changes", {"since": since, "limit": 50})
+
+    async def create_todo(self, rng):
+        todo = await self._call("create_todo", {
+            "title": f"Load test todo {rng.random():.6f}",
+            "description": "Created by benchmark_load.py",
+            "priority": rng.choice(PRIORITIES)
+        })
+        return todo["id"]
+
+    async def update_todo(self, rng, todo_id: int):
+        await self._call("update_todo", {"todo_id": todo_id, "priority": rng.choice(PRIORITIES)})
+
+    async def complete_todo(self, rng, todo_id: int):
+        await self._call("complete_todo", {"todo_id": todo_id})
+
+    async def delete_todo(self, rng, todo_id: int):
+        await self._call("delete_todo", {"todo_id": todo_id})
+
+async def run_workload(client, args) -> dict:
+    """Run concurrency workers for the duration and summarize per operation"""
+    samples = {name: [] for name in {**READ_OPERATIONS, **WRITE_OPERATIONS}}
+    errors = {name: 0 for name in samples}
+    error_messages = {}
+    read_names, read_weights = zip(*READ_OPERATIONS.items())
+    write_names, write_weights = zip(*WRITE_OPERATIONS.items())
+
+    async def worker(number: int, deadline: float, record: bool):
+        rng = random.Random(args.seed * 1000 + number)
+        # Todos this worker created, so updates and deletes never collide
+        owned = []
+        while time.perf_counter() < deadline:
+            if rng.random() < args.read_ratio:
+                name = rng.choices(read_names, read_weights)[0]
+            else:
+                name = rng.choices(write_names, write_weights)[0]
+                if name == "delete_todo" and not owned:
+                    name = "create_todo"
+
+            start = time.perf_counter()
+            try:
+                if name == "create_todo":
+                    owned.append(await client.create_todo(rng))
+                elif name == "delete_todo":
+                    await client.delete_todo(rng, owned.pop(rng.randrange(len(owned))))
+                elif name in WRITE_OPERATIONS:
+                    todo_id = rng.choice(owned) if owned and rng.random() < 0.5 else rng.randint(1, args.rows)
+                    await getattr(client, name)(rng, todo_id)
+                else:
+                    await getattr(client, name)(rng)
+            except Exception as e:
+                if record:
+                    errors[name] += 1
+                    error_messages.setdefault(name, repr(e)[:200])
+                continue
+            if record:
+                samples[name].append((time.perf_counter() - start) * 1000)
+
+    async def run_phase(seconds: float, record: bool):
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(worker(i, deadline, record) for i in range(args.concurrency)))
+
+    await run_phase(args.warmup, record=False)
+    start = time.perf_counter()
+    await run_phase(args.duration, record=True)
+    elapsed = time.perf_counter() - start
+
+    all_samples = [sample for values in samples.values() for sample in values]
+    return {
+        "overall": summarize(all_samples, sum(errors.values()), elapsed),
+        "operations": {
+            name: summarize(values, errors[name], elapsed)
+            for name, values in samples.items()
+        },
+        "error_samples": error_messages,
+    }
+
+def start_api(args) -> subprocess.Popen:
+    """Start uvicorn main:app in a subprocess and wait until it answers"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=HERE,
+        env=os.environ.copy()
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited before it started serving")
+        try:
+            httpx.get(f"http://127.0.0.1:{args.port}/health", timeout=1).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 30s")
+
+async def benchmark_api(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=30) as client:
+        return await run_workload(ApiClient(client, args.changes_since), args)
+
+async def benchmark_mcp(args) -> dict:
+    from fastmcp import Client
+
+    if args.mcp_url:
+        target = args.mcp_url
+    else:
+        import mcp_server
+        target = mcp_server.mcp
+
+    async with Client(target, timeout=30) as client:
+        return await run_workload(McpClient(client, args.changes_since), args)
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_results(target: str, results: dict, baseline=None):
+    print(f"\n{target}: {results['overall']['throughput_rps']:.0f} req/s, "
+          f"{results['overall']['errors']} errors")
+    print(f"{'operation':<15} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}" +
+          (f" {'p95 vs baseline':>16}" if baseline else ""))
+    rows = [("overall", results["overall"])] + list(results["operations"].items())
+    for name, row in rows:
+        line = (f"{name:<15} {row['throughput_rps']:>8.0f} {row['p50_ms']:>7.2f}ms "
+                f"{row['p95_ms']:>7.2f}ms {row['p99_ms']:>7.2f}ms {row['errors']:>7}")
+        if baseline:
+            old = baseline["overall"] if name == "overall" else baseline["operations"].get(name)
+            if old and old["p95_ms"]:
+                line += f" {(row['p95_ms'] / old['p95_ms'] - 1) * 100:>+15.1f}%"
+        print(line)
+    for name, message in results["error_samples"].items():
+        print(f"  first {name} error: {message}")
+
+def run_benchmark(args):
+    """Seed the database, run the workload against each target and write the report"""
+    os.environ.setdefault("TODO_API_BASE", f"http://127.0.0.1:{args.port}")
+    sys.path.insert(0, HERE)
+
+    import repository
+    import seed_data
+    from database import SessionLocal
+
+    start = time.perf_counter()
+    seed_data.seed_todos(args.rows, seed=args.seed)
+    with SessionLocal() as db:
+        args.changes_since = repository.get_latest_change_seq(db)
+    print(f"Seeded {args.rows} todos in {time.perf_counter() - start:.1f}s "
+          f"({args.concurrency} clients, {args.read_ratio:.0%} reads, {args.duration:.0f}s per target)")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    # The API also backs the MCP server when TODO_BACKEND=http (the default)
+    needs_api = args.target in ("api", "both") or (
+        not args.mcp_url and os.getenv("TODO_BACKEND", "http") == "http"
+    )
+    api = start_api(args) if needs_api else None
+
+    results = {}
+    try:
+        if args.target in ("api", "both"):
+            results["api"] = asyncio.run(benchmark_api(args))
+            print_results("api", results["api"], baseline and baseline.get("api"))
+        if args.target in ("mcp", "both"):
+            results["mcp"] = asyncio.run(benchmark_mcp(args))
+            print_results("mcp", results["mcp"], baseline and baseline.get("mcp"))
+    finally:
+        if api:
+            api.terminate()
+            api.wait()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "mcp_backend": os.getenv("TODO_BACKEND", "http"),
+            "mcp_transport": args.mcp_url or "in-process",
+            "settings": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Todos to seed")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per target")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each run")
+    parser.add_argument("--read-ratio", type=float, default=0.8, help="Fraction of operations that are reads")
+    parser.add_argument("--target", choices=["api", "mcp", "both"], default="both")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the API")
+    parser.add_argument("--port", type=int, default=8766, help="Port for the API subprocess")
+    parser.add_argument("--mcp-url", help="MCP server URL to call instead of the in-process server")
+    parser.add_argument("--database-url", help="Database to seed and use (default: a new temporary file)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for data and workload")
+    parser.add_argument("--output", default="load_results.json", help="Results JSON file")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    # The whole run, including the API subprocess, shares one database
+    with temporary_database("load", args.database_url):
+        return run_benchmark(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
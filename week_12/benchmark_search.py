@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text search against a LIKE scan
+Seeds a throwaway database with generated todos, then times
+repository.search_todos (FTS5, ranked by bm25 and in id order) against
+title/description LIKE '%q%' for terms that match few, some and many rows.
+"like" stops at the first page of id-ordered matches; "like all" collects
+every match, the work a client must do to rank results itself
+
+Usage:
+    python benchmark_search.py [--rows 1000000] [--repeat 5]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+# Use a throwaway database so the benchmark never touches todos.db; it is deleted on exit
+from temp_database import use_temporary_database
+
+use_temporary_database("search")
+
+from sqlalchemy import func, insert, literal_column, or_, select
+
+import repository
+from database import SessionLocal, Todo, engine
+
+VERBS = ["buy", "call", "email", "fix", "review", "write", "schedule", "clean", "pay", "plan"]
+NOUNS = ["milk", "invoice", "report", "dentist", "car", "garden", "budget", "slides", "tickets", "laptop"]
+FILLER = ["before", "friday", "with", "team", "about", "the", "new", "project", "and", "client",
+          "urgent", "follow", "up", "notes", "meeting", "weekly", "draft", "final", "check", "list"]
+
+# (label, term): a word in 1 of 10,000 rows, one in 1 of 10, one in most rows
+QUERIES = [
+    ("rare", "zeppelin"),
+    ("medium", "dentist"),
+    ("common", "the"),
+]
+
+def seed(rows: int, batch: int = 10000):
+    """Insert rows generated todos in batches, through the FTS triggers"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            values = []
+            for i in range(start, min(start + batch, rows)):
+                words = rng.choices(FILLER, k=rng.randint(5, 15))
+                if i % 10000 == 0:
+                    words.append("zeppelin")
+                values.append({
+                    "title": f"{rng.choice(VERBS)} {rng.choice(NOUNS)}",
+                    "description": " ".join(words),
+                    "priority": ("low", "medium", "high")[i % 3],
+                    "completed": i % 4 == 0,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+            conn.execute(insert(Todo), values)
+
+def like_search(db, term: str, limit=None):
+    """The LIKE scan an FTS-less search would run"""
+    pattern = f"%{term}%"
+    return db.execute(
+        select(Todo.id, Todo.title)
+        .where(or_(Todo.title.like(pattern), Todo.description.like(pattern)))
+        .order_by(Todo.id)
+        .limit(limit)
+    ).all()
+
+def time_query(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000, help="Todos to seed")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query (median is reported)")
+    parser.add_argument("--limit", type=int, default=20, help="Results per query")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    seed(args.rows)
+    print(f"Seeded {args.rows} todos in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"Median of {args.repeat} runs, limit {args.limit}\n")
+    print(f"{'term':<18} {'matches':>9} {'fts rank':>10} {'fts id':>10} {'like':>10} {'like all':>10}")
+    db = SessionLocal()
+    try:
+        for label, term in QUERIES:
+            matches = db.scalar(
+                select(func.count())
+                .select_from(repository.todos_fts)
+                .where(literal_column("todos_fts").op("MATCH")(term))
+            )
+            timings = [
+                time_query(lambda: repository.search_todos(
+                    db, term, limit=args.limit, fields="id,title", order_by=order_by
+                ), args.repeat)
+                for order_by in ("rank", "id")
+            ]
+            timings.append(time_query(lambda: like_search(db, term, args.limit), args.repeat))
+            timings.append(time_query(lambda: like_search(db, term), args.repeat))
+            print(f"{label + ' (' + term + ')':<18} {matches:>9} " + " ".join(f"{ms:>8.1f}ms" for ms in timings))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialization modes
+Times GET /todos?limit=100 and /todos/stats/summary in-process with the
+"pydantic" (ORM objects validated through TodoResponse) and "fast"
+(column tuples encoded with orjson) serialization modes
+
+Usage:
+    python benchmark_serialization.py [--requests 500] [--rows 1000]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+# Use a throwaway database so the benchmark never touches todos.db; it is deleted on exit
+from temp_database import use_temporary_database
+
+use_temporary_database("serialization")
+
+from fastapi.testclient import TestClient
+
+import main
+
+def seed(client: TestClient, rows: int):
+    """Insert rows todos with descriptions of varying length"""
+    for start in range(0, rows, 1000):
+        batch = [
+            {
+                "title": f"Serialization todo {i}",
+                "description": "Lorem ipsum dolor sit amet. " * (i % 20),
+                "priority": ("low", "medium", "high")[i % 3]
+            }
+            for i in range(start, min(start + 1000, rows))
+        ]
+        client.post("/todos/bulk", json={"todos": batch}).raise_for_status()
+
+def time_requests(client: TestClient, path: str, params: dict, requests: int) -> dict:
+    for _ in range(20):
+        client.get(path, params=params)
+
+    samples = []
+    size = 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path, params=params)
+        samples.append((time.perf_counter() - start) * 1000)
+        size = len(response.content)
+
+    samples.sort()
+    return {
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "bytes": size,
+    }
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint and mode")
+    parser.add_argument("--rows", type=int, default=1000, help="Todos to seed")
+    args = parser.parse_args()
+
+    endpoints = [
+        ("GET /todos?limit=100", "/todos", {"limit": 100}),
+        ("GET /todos/stats/summary", "/todos/stats/summary", {}),
+    ]
+
+    with TestClient(main.app) as client:
+        seed(client, args.rows)
+        print(f"In-process latency over {args.requests} requests ({args.rows} todos)\n")
+        print(f"{'mode':<9} {'endpoint':<26} {'mean':>9} {'p50':>9} {'bytes':>7}")
+        for mode in ("pydantic", "fast"):
+            main.SERIALIZATION = mode
+            for label, path, params in endpoints:
+                row = time_requests(client, path, params, args.requests)
+                print(f"{mode:<9} {label:<26} {row['mean_ms']:>7.3f}ms {row['p50_ms']:>7.3f}ms {row['bytes']:>7}")
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Per-call overhead of MCP client session handling
+Calls one tool in a tight loop through the HTTP gateway four ways: a new
+fastmcp Client per call (connect, initialize and list_tools every time,
+as the old scripts did per run), one held-open Client, the
+mcp_session.McpSessionPool and the SyncMcpClient facade. greet does no
+backend work, so the numbers are client and protocol overhead.
+
+Starts mcp_server_http.py in a subprocess unless --url is given.
+
+Usage:
+    python benchmark_session.py [--calls 500] [--tool greet] [--url http://localhost:8001/mcp]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from fastmcp import Client
+
+from benchmark_gateway import start_server, stop_server
+from mcp_session import McpSessionPool, SyncMcpClient
+
+async def new_client_per_call(url: str, tool: str, arguments: dict, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        async with Client(url) as client:
+            await client.call_tool(tool, arguments)
+    return time.perf_counter() - start
+
+async def held_client(url: str, tool: str, arguments: dict, calls: int) -> float:
+    async with Client(url) as client:
+        await client.call_tool(tool, arguments)
+        start = time.perf_counter()
+        for _ in range(calls):
+            await client.call_tool(tool, arguments)
+        return time.perf_counter() - start
+
+async def session_pool(url: str, tool: str, arguments: dict, calls: int) -> float:
+    async with McpSessionPool(url) as pool:
+        await pool.call_tool(tool, arguments)
+        start = time.perf_counter()
+        for _ in range(calls):
+            await pool.call_tool(tool, arguments)
+        return time.perf_counter() - start
+
+def sync_facade(url: str, tool: str, arguments: dict, calls: int) -> float:
+    with SyncMcpClient(url) as client:
+        client.call_tool(tool, arguments)
+        start = time.perf_counter()
+        for _ in range(calls):
+            client.call_tool(tool, arguments)
+        return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500, help="Calls per mode")
+    parser.add_argument("--tool", default="greet", help="Tool to call")
+    parser.add_argument("--arguments", default='{"name": "benchmark"}', help="Tool arguments as JSON")
+    parser.add_argument("--url", help="MCP server to call (default: start mcp_server_http.py)")
+    parser.add_argument("--port", type=int, default=8767, help="Port for the gateway subprocess")
+    args = parser.parse_args()
+
+    arguments = json.loads(args.arguments)
+    url = args.url or f"http://127.0.0.1:{args.port}/mcp"
+    gateway = None if args.url else start_server("mcp_server_http", args.port, 1, os.environ.copy())
+
+    try:
+        # Reconnecting per call is much slower, so it gets a tenth of the calls
+        per_call_calls = max(1, args.calls // 10)
+        modes = [
+            ("new Client per call", per_call_calls,
+             lambda: asyncio.run(new_client_per_call(url, args.tool, arguments, per_call_calls))),
+            ("held-open Client", args.calls,
+             lambda: asyncio.run(held_client(url, args.tool, arguments, args.calls))),
+            ("McpSessionPool", args.calls,
+             lambda: asyncio.run(session_pool(url, args.tool, arguments, args.calls))),
+            ("SyncMcpClient", args.calls,
+             lambda: sync_facade(url, args.tool, arguments, args.calls)),
+        ]
+        print(f"{args.tool} via {url}\n")
+        print(f"{'mode':<22} {'calls':>6} {'per call':>10} {'calls/s':>9}")
+        for label, calls, run in modes:
+            seconds = run()
+            print(f"{label:<22} {calls:>6} {seconds / calls * 1000:>8.2f}ms {calls / seconds:>9.0f}")
+    finally:
+        if gateway:
+            stop_server(gateway)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Token cost of MCP tool result formats
+Seeds a temporary database, calls get_todos for a 100-row page and
+get_todo_stats in each format through the in-process MCP server, and
+counts the tokens of the text content an agent reads. Uses tiktoken's
+cl100k_base encoding when tiktoken is installed, otherwise estimates
+tokens as characters / 4.
+
+Usage:
+    python benchmark_tokens.py [--rows 100] [--max-description 60]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+from temp_database import temporary_database
+
+def token_counter():
+    """(name, function counting tokens in a string)"""
+    try:
+        import tiktoken
+        # Downloads the encoding on first use, so this can fail offline too
+        encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return "chars/4 estimate (install tiktoken for exact counts)", lambda text: round(len(text) / 4)
+    return "tiktoken cl100k_base", lambda text: len(encoding.encode(text))
+
+async def measure(args, count_tokens):
+    from fastmcp import Client
+    import mcp_server
+
+    page = {"limit": args.rows}
+    cases = [
+        ("get_todos", "json", dict(page)),
+        ("get_todos", "json, 4 fields", {**page, "fields": ["id", "title", "priority", "completed"]}),
+        ("get_todos", "columnar", {**page, "format": "columnar"}),
+        ("get_todos", "tsv", {**page, "format": "tsv"}),
+        ("get_todos", f"json, description<={args.max_description}",
+         {**page, "max_description": args.max_description}),
+        ("get_todos", f"columnar, description<={args.max_description}",
+         {**page, "format": "columnar", "max_description": args.max_description}),
+        ("get_todos", f"tsv, description<={args.max_description}",
+         {**page, "format": "tsv", "max_description": args.max_description}),
+        ("get_todo_stats", "json", {}),
+        ("get_todo_stats", "columnar", {"format": "columnar"}),
+        ("get_todo_stats", "tsv", {"format": "tsv"}),
+    ]
+
+    results = []
+    async with Client(mcp_server.mcp) as client:
+        for tool, label, arguments in cases:
+            result = await client.call_tool(tool, arguments)
+            text = "".join(block.text for block in result.content if hasattr(block, "text"))
+            results.append((tool, label, len(text), count_tokens(text)))
+    return results
+
+def run_benchmark(args):
+    """Seed the database and print the size of each tool result format"""
+    # In-process server; the cache would not change sizes
+    os.environ["TODO_BACKEND"] = "direct"
+    os.environ["TODO_CACHE_TTL"] = "0"
+
+    import seed_data
+
+    seed_data.seed_todos(max(args.rows, 1000), seed=args.seed)
+    counter_name, count_tokens = token_counter()
+    results = asyncio.run(measure(args, count_tokens))
+
+    print(f"Tokens counted with {counter_name}; get_todos pages of {args.rows} rows\n")
+    print(f"{'tool':<15} {'format':<28} {'chars':>8} {'tokens':>8} {'vs json':>8}")
+    baseline = {}
+    for tool, label, chars, tokens in results:
+        baseline.setdefault(tool, tokens)
+        print(f"{tool:<15} {label:<28} {chars:>8} {tokens:>8} {tokens / baseline[tool] - 1:>+8.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100, help="Rows per get_todos result")
+    parser.add_argument("--max-description", type=int, default=60, help="Description truncation to compare")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated todos")
+    args = parser.parse_args()
+
+    # In-process server on a throwaway database
+    with temporary_database("tokens"):
+        return run_benchmark(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark todo write paths
+Compares the original ORM write pattern (SELECT the row, mutate, commit,
+then refresh with another SELECT) against the repository's single-statement
+INSERT/UPDATE ... RETURNING and DELETE paths
+
+Usage:
+    python benchmark_writes.py [--ops 2000]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+# Use a throwaway database so the benchmark never touches todos.db; it is deleted on exit
+from temp_database import use_temporary_database
+
+use_temporary_database("writes")
+
+from sqlalchemy import event
+
+import repository
+from database import SessionLocal, Todo, engine
+from schemas import TodoCreate, TodoUpdate
+
+class LegacyWrites:
+    """The write pattern main.py used before RETURNING"""
+
+    @staticmethod
+    def create(db, todo):
+        db_todo = Todo(title=todo.title, description=todo.description, priority=todo.priority)
+        db.add(db_todo)
+        db.commit()
+        db.refresh(db_todo)
+        return db_todo
+
+    @staticmethod
+    def update(db, todo_id, todo_update):
+        todo = db.query(Todo).filter(Todo.id == todo_id).first()
+        for field, value in todo_update.model_dump(exclude_unset=True).items():
+            setattr(todo, field, value)
+        todo.updated_at = datetime.utcnow()
+        db.commit()
+        db.refresh(todo)
+        return todo
+
+    @staticmethod
+    def complete(db, todo_id):
+        todo = db.query(Todo).filter(Todo.id == todo_id).first()
+        todo.completed = True
+        todo.updated_at = datetime.utcnow()
+        db.commit()
+        db.refresh(todo)
+        return todo
+
+    @staticmethod
+    def delete(db, todo_id):
+        todo = db.query(Todo).filter(Todo.id == todo_id).first()
+        db.delete(todo)
+        db.commit()
+
+class ReturningWrites:
+    """The repository's current write paths"""
+
+    create = staticmethod(repository.create_todo)
+    update = staticmethod(repository.update_todo)
+    complete = staticmethod(repository.complete_todo)
+    delete = staticmethod(repository.delete_todo)
+
+def run(label, writes, ops, expire_on_commit):
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    db = SessionLocal(expire_on_commit=expire_on_commit)
+    try:
+        start = time.perf_counter()
+        ids = [writes.create(db, TodoCreate(title=f"Write {i}", priority="low")).id for i in range(ops)]
+        create_time = time.perf_counter() - start
+        create_statements = len(statements)
+
+        start = time.perf_counter()
+        for todo_id in ids:
+            writes.update(db, todo_id, TodoUpdate(priority="high"))
+            writes.complete(db, todo_id)
+        update_time = time.perf_counter() - start
+        update_statements = len(statements) - create_statements
+
+        start = time.perf_counter()
+        for todo_id in ids:
+            writes.delete(db, todo_id)
+        delete_time = time.perf_counter() - start
+        delete_statements = len(statements) - create_statements - update_statements
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    print(f"{label:<10} create {ops / create_time:>8.0f}/s ({create_statements / ops:.1f} stmts)  "
+          f"update+complete {2 * ops / update_time:>8.0f}/s ({update_statements / (2 * ops):.1f} stmts)  "
+          f"delete {ops / delete_time:>8.0f}/s ({delete_statements / ops:.1f} stmts)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000, help="Todos to create, update, complete and delete")
+    args = parser.parse_args()
+
+    print(f"Writes/sec over {args.ops} todos (statements per write in brackets)\n")
+    # The legacy path relied on the default expire-on-commit session
+    run("legacy", LegacyWrites, args.ops, expire_on_commit=True)
+    run("returning", ReturningWrites, args.ops, expire_on_commit=False)
+
+if __name__ == "__main__":
+    sys.exit(main())
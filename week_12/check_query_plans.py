@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Check that list, stats and overview queries are served by indexes
+Runs EXPLAIN QUERY PLAN for each hot query shape and fails if SQLite
+falls back to a full table scan or a temporary sort
+
+Usage:
+    python check_query_plans.py
+"""
+
+from datetime import datetime
+import sys
+
+# Use a throwaway database so the check never touches todos.db; it is deleted on exit
+from temp_database import use_temporary_database
+
+use_temporary_database("plans")
+
+from sqlalchemy import func
+
+import repository
+from database import SessionLocal, Todo, TodoCounter, explain_query_plan
+
+# A created_at page cursor; only its shape matters to the plan
+CREATED_AT_CURSOR = repository.encode_cursor(Todo(id=1000, created_at=datetime(2024, 1, 1)), "created_at")
+
+# (description, list_todos keyword arguments, rowid scan allowed)
+# An unfiltered page ordered by id walks the table b-tree, which is the
+# primary key index, and stops after LIMIT rows
+LIST_QUERIES = [
+    ("all todos", {}, True),
+    ("all todos after id", {"after_id": 1000}, False),
+    ("completed filter", {"completed": False}, False),
+    ("priority filter", {"priority": "high"}, False),
+    ("completed + priority filter", {"completed": False, "priority": "high"}, False),
+    ("completed + priority after id", {"completed": False, "priority": "high", "after_id": 1000}, False),
+    ("ordered by created_at", {"order_by": "created_at"}, False),
+    ("ordered by created_at after cursor", {"order_by": "created_at", "cursor": CREATED_AT_CURSOR}, False),
+    ("completed filter by created_at", {"completed": False, "order_by": "created_at"}, False),
+    ("completed filter by created_at after cursor",
+     {"completed": False, "order_by": "created_at", "cursor": CREATED_AT_CURSOR}, False),
+    ("priority filter by created_at", {"priority": "high", "order_by": "created_at"}, False),
+    ("priority filter by created_at after cursor",
+     {"priority": "high", "order_by": "created_at", "cursor": CREATED_AT_CURSOR}, False),
+    ("completed + priority by created_at", {"completed": False, "priority": "high", "order_by": "created_at"}, False),
+    ("completed + priority by created_at after cursor",
+     {"completed": False, "priority": "high", "order_by": "created_at", "cursor": CREATED_AT_CURSOR}, False),
+]
+
+def plan_problems(plan, allow_rowid_scan=False):
+    """Return the plan lines that indicate a full scan or extra sort"""
+    # Scans of a LIMIT-ed subquery's co-routine only read the rows it yields
+    coroutines = {line.split()[1] for line in plan if line.startswith("CO-ROUTINE")}
+    problems = []
+    for line in plan:
+        if line.startswith("SCAN") and "USING" not in line and not allow_rowid_scan:
+            if line.split()[1] not in coroutines:
+                problems.append(line)
+        if "TEMP B-TREE" in line:
+            problems.append(line)
+    return problems
+
+def check(db, label, query, allow_rowid_scan=False) -> bool:
+    plan = explain_query_plan(db, query)
+    problems = plan_problems(plan, allow_rowid_scan)
+    status = "FAIL" if problems else "ok"
+    print(f"[{status:>4}] {label}")
+    for line in plan:
+        print(f"         {line}")
+    return not problems
+
+def main():
+    db = SessionLocal()
+    try:
+        results = []
+        for label, kwargs, allow_rowid_scan in LIST_QUERIES:
+            query = repository.build_list_query(db, limit=100, **kwargs)
+            results.append(check(db, f"list: {label}", query, allow_rowid_scan))
+
+        aggregate = (
+            db.query(Todo.completed, Todo.priority, func.count())
+            .group_by(Todo.completed, Todo.priority)
+        )
+        results.append(check(db, "stats: grouped aggregate", aggregate))
+
+        results.append(check(db, "overview: top pending per priority", repository.build_top_pending_query(5)))
+
+        # The counters table holds at most a handful of rows, so a scan is fine
+        counters = db.query(TodoCounter.completed, TodoCounter.priority, TodoCounter.count)
+        print(f"[info] stats: counters -> {explain_query_plan(db, counters)}")
+    finally:
+        db.close()
+
+    if not all(results):
+        print("\nSome queries are not index-served")
+        return 1
+
+    print("\nAll list, stats and overview queries are index-served")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Compact tool result formats for the MCP server
+
+Row lists returned as JSON objects repeat every key on every row, which
+dominates the tokens an agent spends reading them. "columnar" sends the
+column names once and each row as a list of values; "tsv" sends a header
+line and one tab-separated line per row. Both trim timestamps to seconds,
+and descriptions can be truncated in any format.
+"""
+
+from typing import Dict, List, Literal, Optional, Sequence
+
+from schemas import TodoResponse
+
+ResultFormat = Literal["json", "columnar", "tsv"]
+
+# Fields of a todo in the order the API returns them
+TODO_FIELDS = tuple(TodoResponse.model_fields)
+
+# ISO timestamps are cut to "YYYY-MM-DDTHH:MM:SS"
+TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+def truncate(text: Optional[str], max_chars: Optional[int]) -> Optional[str]:
+    """Cut text to max_chars, ending in "…" when anything was removed"""
+    if text is None or max_chars is None or len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 1)] + "…"
+
+def truncate_descriptions(rows: List[Dict], max_chars: Optional[int]) -> List[Dict]:
+    """Copies of rows with descriptions truncated to max_chars"""
+    if max_chars is None:
+        return rows
+    return [
+        {**row, "description": truncate(row["description"], max_chars)} if "description" in row else row
+        for row in rows
+    ]
+
+def todo_columns(fields: Optional[Sequence[str]] = None) -> List[str]:
+    """The columns of a todo page: the requested fields in API order, or every field"""
+    if not fields:
+        return list(TODO_FIELDS)
+    return [field for field in TODO_FIELDS if field in fields]
+
+def _compact_value(column: str, value):
+    if column in TIMESTAMP_FIELDS and isinstance(value, str):
+        return value[:19]
+    return value
+
+def to_columnar(rows: List[Dict], columns: Optional[Sequence[str]] = None) -> Dict:
+    """
+    {"columns": [...], "rows": [[...], ...]} with keys sent once
+
+    columns defaults to the first row's keys; pass it so an empty page
+    still says which columns it would have had.
+    """
+    columns = list(columns or (rows[0].keys() if rows else ()))
+    return {
+        "columns": columns,
+        "rows": [[_compact_value(column, row.get(column)) for column in columns] for row in rows],
+    }
+
+def _tsv_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+def to_tsv(rows: List[Dict], columns: Optional[Sequence[str]] = None) -> str:
+    """A header line plus one tab-separated line per row; tabs and newlines are escaped, None is empty"""
+    table = to_columnar(rows, columns)
+    lines = ["\t".join(table["columns"])]
+    lines.extend("\t".join(_tsv_cell(value) for value in row) for row in table["rows"])
+    return "\n".join(lines)
+
+def format_rows(
+    rows: List[Dict],
+    format: ResultFormat = "json",
+    max_description: Optional[int] = None,
+    key: str = "todos",
+    columns: Optional[Sequence[str]] = None
+) -> Dict:
+    """
+    Shape a list of rows for a tool result
+
+    "json" returns {key: rows}, "columnar" returns {"columns", "rows"}, and
+    "tsv" returns {key: "<tsv text>"}. columns fixes the compact formats'
+    header, which would otherwise come from the first row.
+    """
+    rows = truncate_descriptions(rows, max_description)
+    if format == "columnar":
+        return to_columnar(rows, columns)
+    if format == "tsv":
+        return {key: to_tsv(rows, columns)}
+    return {key: rows}
+
+def flatten_stats(stats: Dict) -> Dict:
+    """Stats with pending_by_priority spread into pending_high/medium/low"""
+    flat = {name: value for name, value in stats.items() if name != "pending_by_priority"}
+    for priority, count in stats.get("pending_by_priority", {}).items():
+        flat[f"pending_{priority}"] = count
+    return flat
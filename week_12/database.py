@@ -2,22 +2,167 @@
 Database configuration and models for Todo application
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime
+from sqlalchemy import create_engine, event, Column, Integer, String, Boolean, DateTime, Index, bindparam, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import sqlite
+from contextvars import ContextVar
 from datetime import datetime
+from typing import List, Optional
+import logging
+import os
+import re
+import time
 
-# Database URL - SQLite
-SQLALCHEMY_DATABASE_URL = "sqlite:///./todos.db"
+from metrics import LatencyMetric
+
+# Database URL - SQLite (override with TODO_DATABASE_URL)
+SQLALCHEMY_DATABASE_URL = os.getenv("TODO_DATABASE_URL", "sqlite:///./todos.db")
+
+# Engine profile: "tuned" (WAL and performance pragmas) or "default" (SQLite defaults)
+TODO_DB_PROFILE = os.getenv("TODO_DB_PROFILE", "tuned")
+
+# Connection pool settings
+TODO_DB_POOL_SIZE = int(os.getenv("TODO_DB_POOL_SIZE", "10"))
+TODO_DB_MAX_OVERFLOW = int(os.getenv("TODO_DB_MAX_OVERFLOW", "20"))
+TODO_DB_POOL_TIMEOUT = float(os.getenv("TODO_DB_POOL_TIMEOUT", "30"))
+
+# Pragmas applied to every new connection, per profile
+SQLITE_PROFILES = {
+    "default": {},
+    "tuned": {
+        # Readers no longer block the writer and commits append to the WAL
+        "journal_mode": os.getenv("TODO_DB_JOURNAL_MODE", "WAL"),
+        # Safe with WAL: only the last commits can be lost on power failure
+        "synchronous": os.getenv("TODO_DB_SYNCHRONOUS", "NORMAL"),
+        # Wait for locks instead of failing with "database is locked"
+        "busy_timeout": int(os.getenv("TODO_DB_BUSY_TIMEOUT_MS", "5000")),
+        # Negative cache_size is in KiB: 64 MiB page cache per connection
+        "cache_size": int(os.getenv("TODO_DB_CACHE_SIZE", "-65536")),
+        "mmap_size": int(os.getenv("TODO_DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "temp_store": "MEMORY",
+    },
+}
+
+if TODO_DB_PROFILE not in SQLITE_PROFILES:
+    raise ValueError(f"Unknown TODO_DB_PROFILE {TODO_DB_PROFILE!r}, expected one of {sorted(SQLITE_PROFILES)}")
+
+def _engine_options(url: str) -> dict:
+    """Engine keyword arguments for the configured profile"""
+    options = {"connect_args": {"check_same_thread": False}}  # SQLite specific
+    # In-memory databases use a single-connection pool that takes no sizing
+    if TODO_DB_PROFILE != "default" and ":memory:" not in url:
+        options.update(
+            pool_size=TODO_DB_POOL_SIZE,
+            max_overflow=TODO_DB_MAX_OVERFLOW,
+            pool_timeout=TODO_DB_POOL_TIMEOUT,
+        )
+    return options
 
 # Create engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite specific
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(SQLALCHEMY_DATABASE_URL))
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    """Apply the profile's pragmas to a new DBAPI connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PROFILES[TODO_DB_PROFILE].items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+
+# Statements slower than this many milliseconds are logged with their
+# parameters and query plan (0 disables the log)
+TODO_SLOW_QUERY_MS = float(os.getenv("TODO_SLOW_QUERY_MS", "100"))
+slow_query_logger = logging.getLogger("todo.slow_query")
+
+# Per-statement timings, keyed by the normalized SQL text
+statement_latency = LatencyMetric(
+    "todo_db_statement_duration_seconds", "SQL statement execution time", ["statement"]
+)
+
+# [seconds, statements] for the request being served, set by api_timing.TimingMiddleware
+query_totals: ContextVar[Optional[list]] = ContextVar("query_totals", default=None)
+
+_PLACEHOLDER_GROUPS = re.compile(r"\(\?(?:, \?)*\)(?:, \(\?(?:, \?)*\))*")
+
+def normalize_statement(statement: str) -> str:
+    """Collapse whitespace and variable-length (?, ?, ...) lists so one query shape is one label"""
+    statement = " ".join(statement.split())
+    return _PLACEHOLDER_GROUPS.sub("(?...)", statement)[:200]
+
+def _explain(conn, statement: str, parameters) -> List[str]:
+    """EXPLAIN QUERY PLAN on the raw connection, so it is neither timed nor logged itself"""
+    if conn.dialect.name != "sqlite" or statement.lstrip()[:6].upper() not in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        return []
+    if isinstance(parameters, list):
+        parameters = parameters[0] if parameters else ()
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [row[3] for row in cursor.fetchall()]
+    except Exception as e:
+        return [f"(no plan: {e})"]
+    finally:
+        cursor.close()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    statement_latency.observe((normalize_statement(statement),), elapsed)
+
+    totals = query_totals.get()
+    if totals is not None:
+        totals[0] += elapsed
+        totals[1] += 1
+
+    if TODO_SLOW_QUERY_MS and elapsed * 1000 >= TODO_SLOW_QUERY_MS:
+        # executemany batches can hold thousands of rows; log the first one
+        shown = f"{parameters[0]!r} (+{len(parameters) - 1} more)" if executemany and parameters else repr(parameters)
+        slow_query_logger.warning(
+            "Slow query (%.1f ms): %s | params=%s | plan=%s",
+            elapsed * 1000, " ".join(statement.split()), shown[:500], _explain(conn, statement, parameters)
+        )
+
+def instrument_engine(sync_engine):
+    """Time every statement on sync_engine and log the slow ones"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+instrument_engine(engine)
+
+# Create session factory; writes load rows with RETURNING, so there is
+# nothing to gain from expiring (and re-selecting) them on commit
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Async engine for TODO_API_MODE=async, created on first use so aiosqlite
+# is only needed when the async path is enabled
+ASYNC_DATABASE_URL = os.getenv(
+    "TODO_ASYNC_DATABASE_URL",
+    SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 )
+_async_engine = None
+_async_session_factory = None
+
+def get_async_engine():
+    """Return the shared AsyncEngine, creating it on first use"""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL))
+        if _async_engine.dialect.name == "sqlite":
+            event.listen(_async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+        instrument_engine(_async_engine.sync_engine)
+        _async_session_factory = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
 
 # Create base model class
 Base = declarative_base()
@@ -34,8 +179,257 @@ class Todo(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+    # Indexes for the hot filter paths; each ends in id so keyset pages
+    # ordered by id (or created_at, id) come straight off the index
+    __table_args__ = (
+        Index("ix_todos_completed_priority_id", "completed", "priority", "id"),
+        Index("ix_todos_completed_id", "completed", "id"),
+        Index("ix_todos_priority_id", "priority", "id"),
+        Index("ix_todos_created_at_id", "created_at", "id"),
+        Index("ix_todos_completed_priority_created_at_id", "completed", "priority", "created_at", "id"),
+        Index("ix_todos_completed_created_at_id", "completed", "created_at", "id"),
+        Index("ix_todos_priority_created_at_id", "priority", "created_at", "id"),
+    )
+
+# Pending/completed counts per priority, maintained by triggers on todos
+class TodoCounter(Base):
+    __tablename__ = "todo_counters"
+
+    completed = Column(Boolean, primary_key=True)
+    priority = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+# Table-level change version, bumped by triggers on every write to todos
+class TodoVersion(Base):
+    __tablename__ = "todo_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+# Ordered log of todo mutations for incremental sync, appended by triggers;
+# AUTOINCREMENT keeps seq strictly increasing even after the newest row is deleted
+class TodoChange(Base):
+    __tablename__ = "todo_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True)
+    todo_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)  # insert, update, delete
+    changed_at = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+
+# Triggers keeping todo_counters, todo_version, todos_fts and todo_changes in step with every insert/update/delete
+TRIGGERS = {
+    "todos_counters_insert": """
+        CREATE TRIGGER IF NOT EXISTS todos_counters_insert AFTER INSERT ON todos
+        BEGIN
+            INSERT INTO todo_counters (completed, priority, count)
+            VALUES (IFNULL(NEW.completed, 0), IFNULL(NEW.priority, ''), 1)
+            ON CONFLICT (completed, priority) DO UPDATE SET count = count + 1;
+        END
+    """,
+    "todos_counters_delete": """
+        CREATE TRIGGER IF NOT EXISTS todos_counters_delete AFTER DELETE ON todos
+        BEGIN
+            UPDATE todo_counters SET count = count - 1
+            WHERE completed = IFNULL(OLD.completed, 0) AND priority = IFNULL(OLD.priority, '');
+        END
+    """,
+    "todos_counters_update": """
+        CREATE TRIGGER IF NOT EXISTS todos_counters_update AFTER UPDATE OF completed, priority ON todos
+        WHEN OLD.completed IS NOT NEW.completed OR OLD.priority IS NOT NEW.priority
+        BEGIN
+            UPDATE todo_counters SET count = count - 1
+            WHERE completed = IFNULL(OLD.completed, 0) AND priority = IFNULL(OLD.priority, '');
+            INSERT INTO todo_counters (completed, priority, count)
+            VALUES (IFNULL(NEW.completed, 0), IFNULL(NEW.priority, ''), 1)
+            ON CONFLICT (completed, priority) DO UPDATE SET count = count + 1;
+        END
+    """,
+    "todos_version_insert": """
+        CREATE TRIGGER IF NOT EXISTS todos_version_insert AFTER INSERT ON todos
+        BEGIN
+            UPDATE todo_version SET version = version + 1 WHERE id = 1;
+        END
+    """,
+    "todos_version_update": """
+        CREATE TRIGGER IF NOT EXISTS todos_version_update AFTER UPDATE ON todos
+        BEGIN
+            UPDATE todo_version SET version = version + 1 WHERE id = 1;
+        END
+    """,
+    "todos_version_delete": """
+        CREATE TRIGGER IF NOT EXISTS todos_version_delete AFTER DELETE ON todos
+        BEGIN
+            UPDATE todo_version SET version = version + 1 WHERE id = 1;
+        END
+    """,
+    "todos_fts_insert": """
+        CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos
+        BEGIN
+            INSERT INTO todos_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+        END
+    """,
+    "todos_fts_delete": """
+        CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos
+        BEGIN
+            INSERT INTO todos_fts (todos_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        END
+    """,
+    "todos_fts_update": """
+        CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF title, description ON todos
+        WHEN OLD.title IS NOT NEW.title OR OLD.description IS NOT NEW.description
+        BEGIN
+            INSERT INTO todos_fts (todos_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description);
+            INSERT INTO todos_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+        END
+    """,
+    "todos_changes_insert": """
+        CREATE TRIGGER IF NOT EXISTS todos_changes_insert AFTER INSERT ON todos
+        BEGIN
+            INSERT INTO todo_changes (todo_id, op) VALUES (NEW.id, 'insert');
+        END
+    """,
+    "todos_changes_update": """
+        CREATE TRIGGER IF NOT EXISTS todos_changes_update AFTER UPDATE ON todos
+        BEGIN
+            INSERT INTO todo_changes (todo_id, op) VALUES (NEW.id, 'update');
+        END
+    """,
+    "todos_changes_delete": """
+        CREATE TRIGGER IF NOT EXISTS todos_changes_delete AFTER DELETE ON todos
+        BEGIN
+            INSERT INTO todo_changes (todo_id, op) VALUES (OLD.id, 'delete');
+        END
+    """,
+}
+
+def rebuild_counters(conn):
+    """Recompute todo_counters from the todos table"""
+    conn.exec_driver_sql("DELETE FROM todo_counters")
+    conn.exec_driver_sql("""
+        INSERT INTO todo_counters (completed, priority, count)
+        SELECT IFNULL(completed, 0), IFNULL(priority, ''), COUNT(*)
+        FROM todos GROUP BY 1, 2
+    """)
+
+def _migration_stats_counters(conn):
+    """Create the todo_counters triggers and backfill existing rows"""
+    for name in ("todos_counters_insert", "todos_counters_delete", "todos_counters_update"):
+        conn.exec_driver_sql(TRIGGERS[name])
+    rebuild_counters(conn)
+
+def _migration_filter_indexes(conn):
+    """Create the composite indexes used by list filters and stats"""
+    for index in Todo.__table__.indexes:
+        if index.name in (
+            "ix_todos_completed_priority_id",
+            "ix_todos_completed_id",
+            "ix_todos_priority_id",
+            "ix_todos_created_at_id",
+        ):
+            index.create(conn, checkfirst=True)
+
+def _migration_created_at_filter_indexes(conn):
+    """Create the indexes serving filtered list pages ordered by created_at"""
+    for index in Todo.__table__.indexes:
+        if index.name in (
+            "ix_todos_completed_priority_created_at_id",
+            "ix_todos_completed_created_at_id",
+            "ix_todos_priority_created_at_id",
+        ):
+            index.create(conn, checkfirst=True)
+
+def _migration_change_version(conn):
+    """Create the todo_version row and the triggers that bump it"""
+    conn.exec_driver_sql("INSERT OR IGNORE INTO todo_version (id, version) VALUES (1, 0)")
+    for name in ("todos_version_insert", "todos_version_update", "todos_version_delete"):
+        conn.exec_driver_sql(TRIGGERS[name])
+
+def _migration_change_log(conn):
+    """Create the triggers that append to todo_changes"""
+    for name in ("todos_changes_insert", "todos_changes_update", "todos_changes_delete"):
+        conn.exec_driver_sql(TRIGGERS[name])
+
+# Full-text index over todos.title/description; an external-content table,
+# so it stores only the index and reads column values back from todos
+TODOS_FTS = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+        title, description, content='todos', content_rowid='id', tokenize='porter unicode61'
+    )
+"""
+
+def rebuild_search_index(conn):
+    """Rebuild todos_fts from the todos table"""
+    conn.exec_driver_sql("INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')")
+
+def _migration_search_index(conn):
+    """Create todos_fts, its sync triggers and the title-weighted ranking, then index existing rows"""
+    conn.exec_driver_sql(TODOS_FTS)
+    for name in ("todos_fts_insert", "todos_fts_delete", "todos_fts_update"):
+        conn.exec_driver_sql(TRIGGERS[name])
+    # ORDER BY rank uses bm25 with title matches weighted ten times description matches
+    conn.exec_driver_sql("INSERT INTO todos_fts (todos_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+    rebuild_search_index(conn)
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = [
+    _migration_stats_counters,
+    _migration_filter_indexes,
+    _migration_change_version,
+    _migration_change_log,
+    _migration_search_index,
+    _migration_created_at_filter_indexes,
+]
+
+def _schema_version(conn) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+def run_migrations(bind=engine):
+    """
+    Create missing tables and apply any migrations the database has not seen yet
+
+    Every process that imports this module runs this, e.g. each uvicorn
+    worker. An up-to-date database is only read. Otherwise the work runs
+    under BEGIN IMMEDIATE, which takes SQLite's write lock before anything is
+    read. The version is then checked again, so processes that lost the race
+    wait for the winner (up to busy_timeout) and find nothing left to do.
+    """
+    with bind.connect() as conn:
+        if _schema_version(conn) >= len(MIGRATIONS):
+            return
+
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # The driver would only BEGIN (deferred) before DML, so issue it ourselves
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            Base.metadata.create_all(bind=conn)
+            version = _schema_version(conn)
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                migration(conn)
+                conn.exec_driver_sql(f"PRAGMA user_version = {number}")
+            conn.exec_driver_sql("COMMIT")
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+
+def explain_query_plan(db, query) -> List[str]:
+    """
+    Return the EXPLAIN QUERY PLAN detail lines for an ORM query or statement
+
+    Lines such as "SEARCH todos USING INDEX ..." mean the query is index
+    served; a bare "SCAN todos" or "USE TEMP B-TREE" means it is not.
+    """
+    statement = getattr(query, "statement", query)
+    compiled = statement.compile(dialect=sqlite.dialect(paramstyle="named"))
+    explain = text(f"EXPLAIN QUERY PLAN {compiled}").bindparams(
+        *[bindparam(name, value) for name, value in compiled.params.items()]
+    )
+    return [row[3] for row in db.execute(explain)]
+
+# Create tables and bring the schema up to date
+run_migrations()
 
 # Dependency to get DB session
 def get_db():
@@ -43,4 +437,18 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def dispose_async_engine():
+    """Close the async engine's pooled connections, if it was ever created"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
+# Dependency to get an async DB session
+async def get_async_db():
+    get_async_engine()
+    async with _async_session_factory() as db:
+        yield db
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Streaming export formats for the Todo API
+
+Encodes batches of column tuples from repository.iter_todo_batches as
+NDJSON (one JSON object per line, the same objects GET /todos returns) or
+CSV (a header row, then one row per todo). Each batch becomes one chunk,
+so an export never holds more than a batch of rows or encoded bytes.
+"""
+
+import csv
+import io
+from typing import Iterable, Iterator, Literal, Sequence, Tuple
+
+from repository import row_to_dict
+
+# orjson is optional, as in main.py
+try:
+    import orjson
+
+    def _dumps(value) -> bytes:
+        return orjson.dumps(value)
+except ImportError:
+    import json
+
+    def _dumps(value) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def encode_ndjson(rows: Sequence[Tuple], columns: Tuple[str, ...]) -> bytes:
+    """One JSON object per row, each ending in a newline"""
+    if not rows:
+        return b""
+    return b"\n".join(_dumps(row_to_dict(row, columns)) for row in rows) + b"\n"
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+def encode_csv(rows: Sequence[Tuple]) -> bytes:
+    """CSV lines for rows; None is empty, booleans are true/false, timestamps ISO 8601"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([_csv_cell(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+def export_chunks(batches: Iterable[Sequence[Tuple]], columns: Tuple[str, ...], format: ExportFormat) -> Iterator[bytes]:
+    """Encode each batch as one chunk; a CSV export starts with its header even when empty"""
+    if format == "csv":
+        yield encode_csv([columns])
+        for rows in batches:
+            yield encode_csv(rows)
+    else:
+        for rows in batches:
+            yield encode_ndjson(rows, columns)
@@ -3,20 +3,66 @@
 FastAPI Todo Application with SQLite Database
 """
 
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
+from contextlib import asynccontextmanager
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
 
-from database import get_db, Todo
-from schemas import TodoCreate, TodoUpdate, TodoResponse
+from api_timing import TimingMiddleware, request_latency
+from database import SessionLocal, get_db, get_async_db, dispose_async_engine, statement_latency
+from metrics import render_prometheus
+from schemas import TodoCreate, TodoUpdate, TodoResponse, TodoBulkCreate, TodoBulkUpdate, TodoBulkDelete
+import export
+import repository
+
+# orjson is optional: without it the fast path falls back to JSONResponse
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    FastJSONResponse = JSONResponse
+
+# Seconds between change log prunes (see repository.prune_changes; 0 disables)
+TODO_CHANGES_PRUNE_INTERVAL = float(os.getenv("TODO_CHANGES_PRUNE_INTERVAL", "60"))
+changes_logger = logging.getLogger("todo.changes")
+
+async def prune_change_log():
+    """Apply the change log retention limits every TODO_CHANGES_PRUNE_INTERVAL seconds"""
+    while True:
+        try:
+            deleted = await asyncio.to_thread(with_session, repository.prune_changes)
+            if deleted:
+                changes_logger.info("Pruned %d change log rows", deleted)
+        except Exception:
+            changes_logger.exception("Change log prune failed")
+        await asyncio.sleep(TODO_CHANGES_PRUNE_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prune the change log in the background; release pooled async connections on shutdown"""
+    pruner = asyncio.create_task(prune_change_log()) if TODO_CHANGES_PRUNE_INTERVAL > 0 else None
+    yield
+    if pruner:
+        pruner.cancel()
+    await dispose_async_engine()
 
 # Create FastAPI app
 app = FastAPI(
     title="Todo API",
     description="A simple Todo API with SQLite database",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -26,8 +72,135 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
 )
 
+# Time every request; added last so it wraps CORS and sees the whole response
+app.add_middleware(TimingMiddleware)
+
+# Handler mode: "sync" runs handlers in the threadpool with a blocking
+# session, "async" runs them on the event loop over an aiosqlite session
+API_MODE = os.getenv("TODO_API_MODE", "sync")
+
+def db_route(handler):
+    """
+    Adapt a handler that takes a sync `db: Session` to TODO_API_MODE
+
+    In async mode the handler runs through AsyncSession.run_sync, so the
+    same code issues its queries via aiosqlite without blocking the event
+    loop or occupying a threadpool thread.
+    """
+    if API_MODE != "async":
+        return handler
+
+    signature = inspect.signature(handler)
+    parameters = [
+        parameter.replace(default=Depends(get_async_db), annotation=AsyncSession)
+        if parameter.name == "db" else parameter
+        for parameter in signature.parameters.values()
+    ]
+
+    @functools.wraps(handler)
+    async def async_handler(*args, db: AsyncSession, **kwargs):
+        return await db.run_sync(lambda session: handler(*args, db=session, **kwargs))
+
+    async_handler.__signature__ = signature.replace(parameters=parameters)
+    return async_handler
+
+# Response serialization: "fast" builds list and stats bodies from column
+# tuples and encodes them with orjson; "pydantic" validates every row
+# through TodoResponse
+SERIALIZATION = os.getenv("TODO_SERIALIZATION", "fast")
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against etag using weak comparison"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching If-None-Match"""
+    return Response(status_code=304, headers={"ETag": etag})
+
+def version_etag(version: int, request: Request, kind: str) -> str:
+    """ETag for a collection view: the table version plus the query string"""
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(query.encode()).hexdigest()[:12]
+    return f'W/"{kind}-{version}-{digest}"'
+
+def todo_etag(todo) -> str:
+    """ETag for a single todo, derived from its updated_at"""
+    return f'W/"todo-{todo.id}-{todo.updated_at.isoformat()}"'
+
+# How often the change stream polls todo_changes, and how long it stays
+# quiet before sending a keep-alive comment
+TODO_CHANGES_POLL_INTERVAL = float(os.getenv("TODO_CHANGES_POLL_INTERVAL", "0.5"))
+TODO_CHANGES_KEEPALIVE = float(os.getenv("TODO_CHANGES_KEEPALIVE", "15"))
+
+def with_session(func, *args, **kwargs):
+    """Call a repository function with its own short-lived session"""
+    db = SessionLocal()
+    try:
+        return func(db, *args, **kwargs)
+    finally:
+        db.close()
+
+def changes_pruned(e: repository.ChangesPrunedError) -> dict:
+    """Body telling a client its cursor is older than the change log"""
+    return {
+        "message": str(e),
+        "since": e.since,
+        "pruned_through": e.pruned_through,
+        "latest_seq": e.latest_seq,
+    }
+
+async def change_events(since: int, limit: int):
+    """
+    Yield todo_changes rows after since as server-sent events, forever
+
+    If changes after since have been pruned, sends a "reset" event and
+    continues from the newest change; the client should re-read the todos.
+    """
+    idle = 0.0
+    while True:
+        try:
+            page = await asyncio.to_thread(with_session, repository.list_changes, since=since, limit=limit)
+        except repository.ChangesPrunedError as e:
+            yield f"id: {e.latest_seq}\nevent: reset\ndata: {json.dumps(changes_pruned(e))}\n\n"
+            since = e.latest_seq
+            continue
+        for change in page["changes"]:
+            yield f"id: {change['seq']}\nevent: {change['op']}\ndata: {json.dumps(change)}\n\n"
+        since = page["last_seq"]
+        if page["has_more"]:
+            continue
+
+        if page["changes"]:
+            idle = 0.0
+        elif idle >= TODO_CHANGES_KEEPALIVE:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(TODO_CHANGES_POLL_INTERVAL)
+        idle += TODO_CHANGES_POLL_INTERVAL
+
+def export_stream(format: str, columns: Tuple[str, ...], filters: Dict) -> Iterator[bytes]:
+    """
+    Encoded export chunks read through a session of their own
+
+    The session stays open until the response has been sent or the client
+    goes away, so it cannot come from get_db. Starlette runs each step of
+    this generator in the threadpool in either API mode.
+    """
+    db = SessionLocal()
+    try:
+        yield from export.export_chunks(repository.iter_todo_batches(db, columns, **filters), columns, format)
+    finally:
+        db.close()
+
 # Root endpoint
 @app.get("/")
 def read_root():
@@ -36,7 +209,10 @@ def read_root():
         "endpoints": {
             "docs": "/docs",
             "todos": "/todos",
-            "health": "/health"
+            "overview": "/todos/overview",
+            "export": "/todos/export",
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
@@ -45,115 +221,304 @@ def read_root():
 def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
+# Request and SQL statement timings
+@app.get("/metrics")
+def get_metrics(format: str = Query("prometheus", pattern="^(prometheus|json)$")):
+    """
+    Aggregated per-endpoint and per-statement timings
+
+    Prometheus text by default; format=json returns count, error rate,
+    mean and p50/p95/p99 per endpoint and per normalized SQL statement.
+    """
+    if format == "json":
+        return {"endpoints": request_latency.summary(), "statements": statement_latency.summary()}
+    return PlainTextResponse(
+        render_prometheus([request_latency, statement_latency]),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # Create a new todo
 @app.post("/todos", response_model=TodoResponse, status_code=201)
+@db_route
 def create_todo(todo: TodoCreate, db: Session = Depends(get_db)):
     """Create a new todo item"""
-    db_todo = Todo(
-        title=todo.title,
-        description=todo.description,
-        priority=todo.priority
-    )
-    db.add(db_todo)
-    db.commit()
-    db.refresh(db_todo)
-    return db_todo
+    return repository.create_todo(db, todo)
 
 # Get all todos with optional filters
 @app.get("/todos", response_model=List[TodoResponse])
+@db_route
 def get_todos(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100),
+    limit: int = Query(100, ge=1, le=1000),
     completed: Optional[bool] = None,
     priority: Optional[str] = None,
+    after_id: Optional[int] = Query(None, ge=0),
+    cursor: Optional[str] = None,
+    order_by: str = Query("id", pattern="^(id|created_at)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,title,priority"),
     db: Session = Depends(get_db)
 ):
-    """Get all todos with optional filtering"""
-    query = db.query(Todo)
+    """
+    Get all todos with optional filtering
 
-    if completed is not None:
-        query = query.filter(Todo.completed == completed)
+    Supports keyset pagination: pass the X-Next-Cursor header of the
+    previous page as cursor to fetch the next one. fields limits the
+    selected and returned columns. Responds 304 to a matching
+    If-None-Match while no todo has changed.
+    """
+    etag = version_etag(repository.get_version(db), request, "todos")
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-    if priority:
-        query = query.filter(Todo.priority == priority)
+    filters = dict(
+        skip=skip,
+        limit=limit,
+        completed=completed,
+        priority=priority,
+        after_id=after_id,
+        cursor=cursor,
+        order_by=order_by
+    )
+    # Projected rows cannot satisfy TodoResponse, so fields always takes the fast path
+    fast = SERIALIZATION == "fast" or bool(fields)
+    try:
+        if fast:
+            todos, next_cursor = repository.list_todo_rows(db, fields=fields, **filters)
+        else:
+            todos, next_cursor = repository.list_todos(db, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    todos = query.offset(skip).limit(limit).all()
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if fast:
+        # Rows are already JSON-ready; skip response_model validation
+        return FastJSONResponse(todos, headers=headers)
+
+    response.headers.update(headers)
     return todos
 
+# Create many todos in one transaction
+@app.post("/todos/bulk", response_model=List[TodoResponse], status_code=201)
+@db_route
+def create_todos(bulk: TodoBulkCreate, db: Session = Depends(get_db)):
+    """Create many todo items with a single multi-row insert"""
+    return repository.create_todos(db, bulk.todos)
+
+# Update many todos in one transaction
+@app.patch("/todos/bulk", response_model=List[TodoResponse])
+@db_route
+def update_todos(bulk: TodoBulkUpdate, db: Session = Depends(get_db)):
+    """Update many todo items; nothing is changed if any ID is missing"""
+    try:
+        return repository.update_todos(db, bulk.updates)
+    except repository.TodosNotFoundError as e:
+        raise HTTPException(status_code=404, detail={"message": "Todos not found", "ids": e.ids})
+
+# Delete many todos in one transaction
+@app.delete("/todos/bulk")
+@db_route
+def delete_todos(bulk: TodoBulkDelete, db: Session = Depends(get_db)):
+    """Delete many todo items; nothing is deleted if any ID is missing"""
+    try:
+        deleted = repository.delete_todos(db, bulk.ids)
+    except repository.TodosNotFoundError as e:
+        raise HTTPException(status_code=404, detail={"message": "Todos not found", "ids": e.ids})
+    return {"deleted": deleted}
+
+# Full-text search
+@app.get("/todos/search", response_model=List[TodoResponse])
+@db_route
+def search_todos(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Words to find in titles and descriptions"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=1000),
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,title,priority"),
+    order_by: str = Query("rank", pattern="^(rank|id)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Search todo titles and descriptions, best matches first
+
+    Every word in q must appear (stemmed, so "run" finds "running");
+    title matches rank above description matches. order_by=id skips
+    ranking and returns matches in id order, which stays fast for words
+    that appear in much of the table.
+    """
+    etag = version_etag(repository.get_version(db), request, "search")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    try:
+        todos = repository.search_todos(
+            db, q, limit=limit, skip=skip, completed=completed, priority=priority,
+            fields=fields, order_by=order_by
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(todos, headers={"ETag": etag})
+
+# Stats, completion rate and the next pending todos in one request
+@app.get("/todos/overview")
+@db_route
+def get_overview(
+    request: Request,
+    limit: int = Query(5, ge=1, le=50, description="Pending todos to return per priority"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get todo statistics, the completion rate and the first pending todos of
+    each priority; 304 if If-None-Match still matches
+    """
+    etag = version_etag(repository.get_version(db), request, "overview")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    return FastJSONResponse(repository.get_overview(db, limit), headers={"ETag": etag})
+
+# Incremental change feed
+@app.get("/todos/changes")
+@db_route
+def get_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Get todo inserts, updates and deletes with seq greater than since
+
+    Pass last_seq from the response back as since to fetch only newer
+    changes; has_more is true while another page is waiting. Answers 410
+    when changes after since have been pruned: re-read the todos, then
+    continue from latest_seq.
+    """
+    try:
+        changes = repository.list_changes(db, since=since, limit=limit)
+    except repository.ChangesPrunedError as e:
+        raise HTTPException(status_code=410, detail=changes_pruned(e))
+    if SERIALIZATION == "fast":
+        return FastJSONResponse(changes)
+    return changes
+
+# Change feed as server-sent events
+@app.get("/todos/changes/stream")
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Stream todo changes as server-sent events
+
+    Each event has the change seq as its id and the operation as its type.
+    Starts after since, or after the Last-Event-ID header on reconnect;
+    with neither, only changes made from now on are sent.
+    """
+    if since is None:
+        last_event_id = request.headers.get("last-event-id", "")
+        if last_event_id.isdigit():
+            since = int(last_event_id)
+        else:
+            since = await asyncio.to_thread(with_session, repository.get_latest_change_seq)
+
+    return StreamingResponse(
+        change_events(since, limit),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Stream every matching todo as NDJSON or CSV
+@app.get("/todos/export")
+def export_todos(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, description="Stop after this many todos (default: all)"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to export, e.g. id,title,priority")
+):
+    """
+    Export todos in id order as NDJSON (one object per line) or CSV
+
+    Rows are read from a single query in batches of TODO_EXPORT_BATCH_SIZE
+    and sent as they are encoded, so memory use does not grow with the
+    table and the first rows arrive before the last are read.
+    """
+    try:
+        columns = repository.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filters = dict(completed=completed, priority=priority, limit=limit)
+    return StreamingResponse(
+        export_stream(format, columns, filters),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="todos.{format}"'}
+    )
+
 # Get a specific todo by ID
 @app.get("/todos/{todo_id}", response_model=TodoResponse)
-def get_todo(todo_id: int, db: Session = Depends(get_db)):
-    """Get a specific todo by ID"""
-    todo = db.query(Todo).filter(Todo.id == todo_id).first()
+@db_route
+def get_todo(todo_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Get a specific todo by ID; 304 if If-None-Match still matches"""
+    todo = repository.get_todo(db, todo_id)
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
+
+    etag = todo_etag(todo)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
     return todo
 
 # Update a todo
 @app.patch("/todos/{todo_id}", response_model=TodoResponse)
+@db_route
 def update_todo(todo_id: int, todo_update: TodoUpdate, db: Session = Depends(get_db)):
     """Update a todo item"""
-    todo = db.query(Todo).filter(Todo.id == todo_id).first()
+    todo = repository.update_todo(db, todo_id, todo_update)
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
-
-    update_data = todo_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(todo, field, value)
-
-    todo.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(todo)
     return todo
 
 # Delete a todo
 @app.delete("/todos/{todo_id}", status_code=204)
+@db_route
 def delete_todo(todo_id: int, db: Session = Depends(get_db)):
     """Delete a todo item"""
-    todo = db.query(Todo).filter(Todo.id == todo_id).first()
-    if not todo:
+    if not repository.delete_todo(db, todo_id):
         raise HTTPException(status_code=404, detail="Todo not found")
-
-    db.delete(todo)
-    db.commit()
     return None
 
 # Mark todo as complete
 @app.post("/todos/{todo_id}/complete", response_model=TodoResponse)
+@db_route
 def complete_todo(todo_id: int, db: Session = Depends(get_db)):
     """Mark a todo as completed"""
-    todo = db.query(Todo).filter(Todo.id == todo_id).first()
+    todo = repository.complete_todo(db, todo_id)
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
-
-    todo.completed = True
-    todo.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(todo)
     return todo
 
 # Get statistics
 @app.get("/todos/stats/summary")
-def get_stats(db: Session = Depends(get_db)):
-    """Get todo statistics"""
-    total = db.query(Todo).count()
-    completed = db.query(Todo).filter(Todo.completed == True).count()
-    pending = total - completed
+@db_route
+def get_stats(request: Request, db: Session = Depends(get_db)):
+    """Get todo statistics; 304 if If-None-Match still matches"""
+    etag = version_etag(repository.get_version(db), request, "stats")
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-    high_priority = db.query(Todo).filter(Todo.priority == "high", Todo.completed == False).count()
-    medium_priority = db.query(Todo).filter(Todo.priority == "medium", Todo.completed == False).count()
-    low_priority = db.query(Todo).filter(Todo.priority == "low", Todo.completed == False).count()
-
-    return {
-        "total": total,
-        "completed": completed,
-        "pending": pending,
-        "pending_by_priority": {
-            "high": high_priority,
-            "medium": medium_priority,
-            "low": low_priority
-        }
-    }
+    stats = repository.get_stats(db)
+    if SERIALIZATION == "fast":
+        return FastJSONResponse(stats, headers={"ETag": etag})
+    return JSONResponse(stats, headers={"ETag": etag})
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,22 +1,126 @@
 #!/usr/bin/env python3
 """
 FastMCP Client Example
-This client demonstrates how to interact with the MCP server
+This client demonstrates how to interact with the MCP server, one call at a
+time or with independent calls pipelined over one session
 """
 
 import asyncio
+from dataclasses import dataclass, field
 from fastmcp import Client
 import json
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
 
-# MCP Server URL (when running in HTTP mode)
-MCP_SERVER_URL = "http://localhost:8001/mcp"
+from mcp_session import MCP_SERVER_URL, McpSessionPool
+
+# A connected fastmcp Client or a session pool; both have call_tool
+ToolClient = Union[Client, McpSessionPool]
+
+# Calls kept in flight at once by call_many and run_dag
+MAX_IN_FLIGHT = 8
+
+async def call_many(
+    client: ToolClient,
+    calls: Sequence[Tuple[str, Dict]],
+    max_in_flight: int = MAX_IN_FLIGHT
+) -> List[Any]:
+    """
+    Run independent tool calls concurrently over one session
+
+    Args:
+        client: Connected client or session pool
+        calls: (tool name, arguments) pairs
+        max_in_flight: Most calls outstanding at once
+
+    Returns:
+        Each call's result data, in the order of calls
+    """
+    window = asyncio.Semaphore(max_in_flight)
+
+    async def call(tool: str, arguments: Dict):
+        async with window:
+            return (await client.call_tool(tool, arguments)).data
+
+    return await asyncio.gather(*(call(tool, arguments) for tool, arguments in calls))
+
+@dataclass
+class ToolCall:
+    """
+    One node of a call graph for run_dag
+
+    arguments is a dict, or a function of the results of the calls named in
+    after (a dict keyed by name) that returns one.
+    """
+    tool: str
+    arguments: Union[Dict, Callable[[Dict[str, Any]], Dict]] = field(default_factory=dict)
+    after: Tuple[str, ...] = ()
+
+def dag_order(calls: Dict[str, ToolCall]) -> List[str]:
+    """Names of calls with every call after its dependencies; ValueError on unknown names or cycles"""
+    order, state = [], {}
+
+    def visit(name: str, path: Tuple[str, ...]):
+        if name not in calls:
+            raise ValueError(f"{path[-1]} depends on unknown call {name}")
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Call cycle: {' -> '.join(path + (name,))}")
+        state[name] = "visiting"
+        for dependency in calls[name].after:
+            visit(dependency, path + (name,))
+        state[name] = "done"
+        order.append(name)
+
+    for name in calls:
+        visit(name, ())
+    return order
+
+async def run_dag(
+    client: ToolClient,
+    calls: Dict[str, ToolCall],
+    max_in_flight: int = MAX_IN_FLIGHT
+) -> Dict[str, Any]:
+    """
+    Run a graph of tool calls, each as soon as the calls it depends on finish
+
+    A call takes a slot in the in-flight window only once its dependencies
+    are done, so waiting calls never block ready ones. If a call fails, the
+    rest are cancelled and the error is raised.
+
+    Returns:
+        Result data keyed by call name
+    """
+    window = asyncio.Semaphore(max_in_flight)
+    results: Dict[str, Any] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(name: str):
+        call = calls[name]
+        await asyncio.gather(*(tasks[dependency] for dependency in call.after))
+        arguments = call.arguments
+        if callable(arguments):
+            arguments = arguments({dependency: results[dependency] for dependency in call.after})
+        async with window:
+            results[name] = (await client.call_tool(call.tool, arguments)).data
+
+    # Dependencies first, so every task can look up the tasks it waits for
+    for name in dag_order(calls):
+        tasks[name] = asyncio.create_task(run(name))
+    try:
+        await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+    return results
 
 async def demo_client():
     """
     Demonstrate various MCP tool calls
     """
     # Create client instance
-    client = Client(MCP_SERVER_URL)
+    client = McpSessionPool(MCP_SERVER_URL)
 
     async with client:
         print("=== MCP Client Demo ===\n")
@@ -24,35 +128,35 @@ async def demo_client():
         # 1. Simple greeting
         print("1. Greeting Tool:")
         result = await client.call_tool("greet", {"name": "Developer"})
-        print(f"   Response: {result}\n")
+        print(f"   Response: {result.data}\n")
 
         # 2. Get todo statistics
         print("2. Todo Statistics:")
-        stats = await client.call_tool("get_todo_stats", {})
+        stats = (await client.call_tool("get_todo_stats", {})).data
         print(f"   Stats: {json.dumps(stats, indent=2)}\n")
 
         # 3. Calculate completion rate
         print("3. Completion Rate:")
         if stats:
-            rate = await client.call_tool(
+            rate = (await client.call_tool(
                 "calculate_completion_rate",
                 {
                     "total": stats["total"],
                     "completed": stats["completed"]
                 }
-            )
+            )).data
             print(f"   Rate: {json.dumps(rate, indent=2)}\n")
 
         # 4. Get pending high-priority todos
         print("4. High Priority Pending Todos:")
-        high_priority = await client.call_tool(
+        high_priority = (await client.call_tool(
             "get_todos",
             {
                 "completed": False,
                 "priority": "high",
                 "limit": 5
             }
-        )
+        )).data
         print(f"   Found {high_priority['count']} high priority todos")
         for todo in high_priority["todos"]:
             print(f"   - [{todo['id']}] {todo['title']}")
@@ -60,41 +164,41 @@ async def demo_client():
 
         # 5. Create a new todo
         print("5. Creating New Todo:")
-        new_todo = await client.call_tool(
+        new_todo = (await client.call_tool(
             "create_todo",
             {
                 "title": "Test MCP Integration",
                 "description": "Created via MCP client",
                 "priority": "medium"
             }
-        )
+        )).data
         print(f"   Created: {new_todo['title']} (ID: {new_todo['id']})\n")
 
         # 6. Update the todo
         print("6. Updating Todo:")
-        updated_todo = await client.call_tool(
+        updated_todo = (await client.call_tool(
             "update_todo",
             {
                 "todo_id": new_todo["id"],
                 "description": "Updated via MCP client - testing update functionality"
             }
-        )
+        )).data
         print(f"   Updated description: {updated_todo['description']}\n")
 
         # 7. Complete the todo
         print("7. Completing Todo:")
-        completed_todo = await client.call_tool(
+        completed_todo = (await client.call_tool(
             "complete_todo",
             {"todo_id": new_todo["id"]}
-        )
+        )).data
         print(f"   Todo marked as completed: {completed_todo['completed']}\n")
 
         # 8. Get all todos (first 5)
         print("8. List Recent Todos:")
-        all_todos = await client.call_tool(
+        all_todos = (await client.call_tool(
             "get_todos",
             {"limit": 5}
-        )
+        )).data
         print(f"   Showing {len(all_todos['todos'])} of {all_todos['count']} todos:")
         for todo in all_todos["todos"]:
             status = "✓" if todo["completed"] else "○"
@@ -103,19 +207,84 @@ async def demo_client():
 
         # 9. Delete the test todo
         print("9. Cleaning Up:")
-        delete_result = await client.call_tool(
+        delete_result = (await client.call_tool(
             "delete_todo",
             {"todo_id": new_todo["id"]}
-        )
+        )).data
         print(f"   {delete_result['message']}\n")
 
         print("=== Demo Complete ===")
 
+def demo_calls() -> Dict[str, ToolCall]:
+    """The calls made by demo_client, with the order they actually depend on"""
+    return {
+        "greet": ToolCall("greet", {"name": "Developer"}),
+        "stats": ToolCall("get_todo_stats"),
+        "rate": ToolCall(
+            "calculate_completion_rate",
+            lambda r: {"total": r["stats"]["total"], "completed": r["stats"]["completed"]},
+            after=("stats",)
+        ),
+        "high_priority": ToolCall("get_todos", {"completed": False, "priority": "high", "limit": 5}),
+        "create": ToolCall("create_todo", {
+            "title": "Test MCP Integration",
+            "description": "Created via MCP client",
+            "priority": "medium"
+        }),
+        "update": ToolCall(
+            "update_todo",
+            lambda r: {
+                "todo_id": r["create"]["id"],
+                "description": "Updated via MCP client - testing update functionality"
+            },
+            after=("create",)
+        ),
+        "complete": ToolCall("complete_todo", lambda r: {"todo_id": r["update"]["id"]}, after=("update",)),
+        "recent": ToolCall("get_todos", {"limit": 5}, after=("complete",)),
+        "delete": ToolCall("delete_todo", lambda r: {"todo_id": r["complete"]["id"]}, after=("complete", "recent")),
+    }
+
+async def compare_pipelined(rounds: int = 5):
+    """
+    Time the demo's calls run one at a time and as a pipelined graph
+
+    Both modes make the same calls over one session; the sequential run is
+    run_dag with a window of one.
+    """
+    client = McpSessionPool(MCP_SERVER_URL)
+
+    async with client:
+        print("=== Sequential vs Pipelined ===\n")
+        calls = demo_calls()
+        print(f"{len(calls)} calls, longest dependency chain: create -> update -> complete -> recent -> delete\n")
+        timings = {"sequential": [], "pipelined": []}
+        for _ in range(rounds):
+            for mode, window in (("sequential", 1), ("pipelined", MAX_IN_FLIGHT)):
+                start = time.perf_counter()
+                await run_dag(client, calls, max_in_flight=window)
+                timings[mode].append(time.perf_counter() - start)
+
+        sequential = sorted(timings["sequential"])[rounds // 2]
+        pipelined = sorted(timings["pipelined"])[rounds // 2]
+        print(f"   Sequential: {sequential * 1000:.1f} ms (median of {rounds})")
+        print(f"   Pipelined:  {pipelined * 1000:.1f} ms (window of {MAX_IN_FLIGHT})")
+        print(f"   Saved {(sequential - pipelined) * 1000:.1f} ms ({1 - pipelined / sequential:.0%})\n")
+
+        # Independent reads only, batched
+        start = time.perf_counter()
+        stats, high, low = await call_many(client, [
+            ("get_todo_stats", {}),
+            ("get_todos", {"completed": False, "priority": "high", "limit": 5}),
+            ("get_todos", {"completed": False, "priority": "low", "limit": 5}),
+        ])
+        print(f"   call_many of 3 reads: {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"{stats['pending']} pending, {high['count']} high / {low['count']} low shown\n")
+
 async def interactive_client():
     """
     Interactive client for manual testing
     """
-    client = Client(MCP_SERVER_URL)
+    client = McpSessionPool(MCP_SERVER_URL)
 
     print("=== Interactive MCP Client ===")
     print("Available tools:")
@@ -140,7 +309,7 @@ async def interactive_client():
                 params_str = input("Enter parameters as JSON (or {} for none): ").strip()
                 params = json.loads(params_str) if params_str else {}
 
-                result = await client.call_tool(tool_name, params)
+                result = (await client.call_tool(tool_name, params)).data
                 print(f"\nResult:\n{json.dumps(result, indent=2)}\n")
 
             except KeyboardInterrupt:
@@ -155,13 +324,16 @@ if __name__ == "__main__":
     print("FastMCP Client")
     print("1. Run automated demo")
     print("2. Interactive mode")
+    print("3. Compare sequential and pipelined calls")
 
-    choice = input("\nSelect mode (1 or 2): ").strip()
+    choice = input("\nSelect mode (1, 2 or 3): ").strip()
 
     if choice == "1":
         asyncio.run(demo_client())
     elif choice == "2":
         asyncio.run(interactive_client())
+    elif choice == "3":
+        asyncio.run(compare_pipelined())
     else:
         print("Invalid choice. Running demo mode...")
         asyncio.run(demo_client())
\ No newline at end of file
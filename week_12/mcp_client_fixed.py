@@ -1,19 +1,17 @@
 #!/usr/bin/env python3
 """
 Fixed FastMCP Client for HTTP Transport
-Properly handles the HTTP/SSE transport used by FastMCP
+Talks to the MCP HTTP server through the shared sessions in mcp_session.py
 """
 
 import asyncio
-from mcp import ClientSession
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any
 
-# MCP Server URL
-MCP_SERVER_URL = "http://localhost:8001/mcp"
+from mcp_session import MCP_SERVER_URL, McpSessionPool
 
 async def call_mcp_tool(
-    session: ClientSession,
+    session: McpSessionPool,
     tool_name: str,
     arguments: Dict[str, Any]
 ) -> Any:
@@ -21,24 +19,15 @@ async def call_mcp_tool(
     Helper function to call MCP tools
 
     Args:
-        session: MCP client session
+        session: MCP session pool
         tool_name: Name of the tool to call
         arguments: Tool arguments
 
     Returns:
-        Tool result
+        Tool result data (dicts for the Todo tools)
     """
     result = await session.call_tool(tool_name, arguments)
-    # Extract the actual content from the result
-    if hasattr(result, 'content'):
-        # Parse JSON if it's a string
-        if isinstance(result.content, str):
-            try:
-                return json.loads(result.content)
-            except json.JSONDecodeError:
-                return result.content
-        return result.content
-    return result
+    return result.data
 
 async def demo_client():
     """
@@ -48,18 +37,13 @@ async def demo_client():
 
     try:
         # Create client session with HTTP transport
-        async with ClientSession(
-            uri=MCP_SERVER_URL,
-            transport="http"
-        ) as session:
-            # Initialize the session
-            await session.initialize()
+        async with McpSessionPool(MCP_SERVER_URL) as session:
             print("✅ Connected to MCP server\n")
 
             # List available tools
             tools = await session.list_tools()
             print("Available tools:")
-            for tool in tools.tools:
+            for tool in tools:
                 print(f"  - {tool.name}")
             print()
 
@@ -152,7 +136,7 @@ async def demo_client():
     except Exception as e:
         print(f"❌ Failed to connect to MCP server: {e}")
         print(f"   Make sure the MCP server is running:")
-        print(f"   fastmcp run mcp_server.py:mcp --transport http --port 8001")
+        print(f"   python mcp_server_http.py")
 
 async def interactive_client():
     """
@@ -161,17 +145,13 @@ async def interactive_client():
     print("=== Interactive MCP Client (HTTP Transport) ===")
 
     try:
-        async with ClientSession(
-            uri=MCP_SERVER_URL,
-            transport="http"
-        ) as session:
-            await session.initialize()
+        async with McpSessionPool(MCP_SERVER_URL) as session:
             print("✅ Connected to MCP server\n")
 
             # List available tools
             tools = await session.list_tools()
             print("Available tools:")
-            for tool in tools.tools:
+            for tool in tools:
                 print(f"  - {tool.name}: {tool.description[:60]}...")
 
             print("\nType 'quit' to exit")
@@ -184,7 +164,7 @@ async def interactive_client():
                     if tool_name.lower() == 'quit':
                         break
                     elif tool_name.lower() == 'list':
-                        for tool in tools.tools:
+                        for tool in tools:
                             print(f"  - {tool.name}")
                         continue
 
@@ -219,15 +199,10 @@ async def test_connection():
     """
     print("Testing MCP Server Connection...")
     try:
-        async with ClientSession(
-            uri=MCP_SERVER_URL,
-            transport="http"
-        ) as session:
-            await session.initialize()
-            print("✅ Successfully connected to MCP server")
-
+        async with McpSessionPool(MCP_SERVER_URL) as session:
             tools = await session.list_tools()
-            print(f"✅ Found {len(tools.tools)} tools available")
+            print("✅ Successfully connected to MCP server")
+            print(f"✅ Found {len(tools)} tools available")
             return True
     except Exception as e:
         print(f"❌ Connection failed: {e}")
@@ -239,7 +214,7 @@ if __name__ == "__main__":
     # First test connection
     if not asyncio.run(test_connection()):
         print("\n⚠️  Please start the MCP server first:")
-        print("  fastmcp run mcp_server.py:mcp --transport http --port 8001")
+        print("  python mcp_server_http.py")
         exit(1)
 
     print("\n" + "=" * 50)
@@ -5,17 +5,71 @@ This server provides MCP tools to interact with the Todo FastAPI application
 """
 
 from fastmcp import FastMCP
-import httpx
+from contextlib import asynccontextmanager
 import json
-from typing import Dict, List, Optional
+from typing import Annotated, AsyncIterator, Dict, List, Literal, Optional
+
+import os
+
+from mcp.types import ToolAnnotations
+from pydantic import Field
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from backends import create_backend, shared_http_client
+from compact import ResultFormat, flatten_stats, format_rows, todo_columns
+from metrics import render_counter
+from tool_cache import ToolCacheMiddleware
+from tool_metrics import InstrumentedBackend, ToolMetricsMiddleware
+
+# Call counts, errors and latency for every tool and backend call
+tool_metrics = ToolMetricsMiddleware()
+
+# Backend used by the tools (TODO_BACKEND=http|direct), timed per call
+backend = InstrumentedBackend(create_backend(), tool_metrics)
+
+# Argument bounds matching the API's Query() checks, so both backends reject
+# the same calls before they reach the repository
+PageLimit = Annotated[int, Field(ge=1, le=1000)]
+ChangeSeq = Annotated[int, Field(ge=0)]
+
+# Marks tools that change nothing, so clients may safely retry them
+READ_ONLY = ToolAnnotations(readOnlyHint=True)
+
+# Read-through cache for read-only tools, cleared by any write tool
+tool_cache = ToolCacheMiddleware(
+    cached_tools=["get_todos", "search_todos", "get_todo_stats", "get_todo_overview"],
+    invalidating_tools=[
+        "create_todo", "update_todo", "delete_todo", "complete_todo",
+        "create_todos", "update_todos", "complete_todos", "delete_todos",
+    ],
+    maxsize=int(os.getenv("TODO_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("TODO_CACHE_TTL", "5.0"))
+)
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[Dict]:
+    """Keep the shared HTTP client open for the lifetime of the server"""
+    async with shared_http_client():
+        yield {}
 
 # Initialize FastMCP server
-mcp = FastMCP("Todo MCP Server")
-
-# Base URL for the Todo API
-TODO_API_BASE = "http://localhost:8000"
-
-@mcp.tool
+# Metrics come first so cache hits are timed too. An explicit version saves
+# the SDK reading package metadata for every stateless HTTP request.
+mcp = FastMCP("Todo MCP Server", version="1.0.0", lifespan=lifespan, middleware=[tool_metrics, tool_cache])
+
+# Prometheus scrape endpoint, served when running over HTTP
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    cache = tool_cache.cache.stats()
+    body = tool_metrics.render([
+        *render_counter("todo_mcp_cache_hits_total", "Tool results served from the cache", cache["hits"]),
+        *render_counter("todo_mcp_cache_misses_total", "Cacheable tool calls that missed the cache", cache["misses"]),
+        *render_counter("todo_mcp_cache_entries", "Tool results currently cached", cache["size"], kind="gauge"),
+    ])
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@mcp.tool(annotations=READ_ONLY)
 def greet(name: str) -> str:
     """
     Simple greeting tool
@@ -28,11 +82,16 @@ def greet(name: str) -> str:
     """
     return f"Hello, {name}! Welcome to the Todo MCP Server."
 
-@mcp.tool
+@mcp.tool(annotations=READ_ONLY)
 async def get_todos(
     completed: Optional[bool] = None,
     priority: Optional[str] = None,
-    limit: int = 10
+    limit: PageLimit = 10,
+    cursor: Optional[str] = None,
+    order_by: Literal["id", "created_at"] = "id",
+    fields: Optional[List[str]] = None,
+    format: ResultFormat = "json",
+    max_description: Optional[int] = None
 ) -> Dict:
     """
     Retrieve todos from the API with optional filters
@@ -40,12 +99,64 @@ async def get_todos(
     Args:
         completed: Filter by completion status (optional)
         priority: Filter by priority level (low/medium/high) (optional)
-        limit: Maximum number of todos to return
+        limit: Maximum number of todos to return (1-1000)
+        cursor: next_cursor from a previous call to fetch the following page (optional)
+        order_by: Sort key, "id" or "created_at"
+        fields: Only return these fields, e.g. ["id", "title", "priority"] (optional)
+        format: "json" (list of objects), "columnar" (columns once, then a list
+            of values per row) or "tsv" (tab-separated text with a header line);
+            the compact formats cut timestamps to seconds
+        max_description: Truncate descriptions to this many characters (optional)
+
+    Returns:
+        Dictionary containing the todos and next_cursor (None on the last page)
+    """
+    params = {"limit": limit, "order_by": order_by}
+
+    if completed is not None:
+        params["completed"] = completed
+
+    if priority:
+        params["priority"] = priority
+
+    if cursor:
+        params["cursor"] = cursor
+
+    if fields:
+        params["fields"] = ",".join(fields)
+
+    todos, next_cursor = await backend.list_todos(params)
+
+    return {
+        "count": len(todos),
+        **format_rows(todos, format, max_description, columns=todo_columns(fields)),
+        "next_cursor": next_cursor
+    }
+
+@mcp.tool(annotations=READ_ONLY)
+async def search_todos(
+    query: str,
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    limit: PageLimit = 10,
+    fields: Optional[List[str]] = None,
+    order_by: Literal["rank", "id"] = "rank"
+) -> Dict:
+    """
+    Search todo titles and descriptions, best matches first
+
+    Args:
+        query: Words that must all appear, e.g. "invoice client"
+        completed: Filter by completion status (optional)
+        priority: Filter by priority level (low/medium/high) (optional)
+        limit: Maximum number of todos to return (1-1000)
+        fields: Only return these fields, e.g. ["id", "title"] (optional)
+        order_by: "rank" for best match first, or "id" (faster for very common words)
 
     Returns:
-        Dictionary containing list of todos
+        Dictionary containing the matching todos
     """
-    params = {"limit": limit}
+    params = {"q": query, "limit": limit, "order_by": order_by}
 
     if completed is not None:
         params["completed"] = completed
@@ -53,10 +164,10 @@ async def get_todos(
     if priority:
         params["priority"] = priority
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{TODO_API_BASE}/todos", params=params)
-        response.raise_for_status()
-        todos = response.json()
+    if fields:
+        params["fields"] = ",".join(fields)
+
+    todos = await backend.search_todos(params)
 
     return {
         "count": len(todos),
@@ -88,14 +199,7 @@ async def create_todo(
     if description:
         todo_data["description"] = description
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{TODO_API_BASE}/todos",
-            json=todo_data
-        )
-        response.raise_for_status()
-
-    return response.json()
+    return await backend.create_todo(todo_data)
 
 @mcp.tool
 async def update_todo(
@@ -132,14 +236,7 @@ async def update_todo(
     if priority is not None:
         update_data["priority"] = priority
 
-    async with httpx.AsyncClient() as client:
-        response = await client.patch(
-            f"{TODO_API_BASE}/todos/{todo_id}",
-            json=update_data
-        )
-        response.raise_for_status()
-
-    return response.json()
+    return await backend.update_todo(todo_id, update_data)
 
 @mcp.tool
 async def delete_todo(todo_id: int) -> Dict:
@@ -152,9 +249,7 @@ async def delete_todo(todo_id: int) -> Dict:
     Returns:
         Confirmation message
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(f"{TODO_API_BASE}/todos/{todo_id}")
-        response.raise_for_status()
+    await backend.delete_todo(todo_id)
 
     return {"message": f"Todo {todo_id} deleted successfully"}
 
@@ -169,27 +264,175 @@ async def complete_todo(todo_id: int) -> Dict:
     Returns:
         Updated todo item
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{TODO_API_BASE}/todos/{todo_id}/complete")
-        response.raise_for_status()
+    return await backend.complete_todo(todo_id)
+
+@mcp.tool
+async def create_todos(todos: List[Dict]) -> Dict:
+    """
+    Create many todo items in one request
 
-    return response.json()
+    Args:
+        todos: List of todos, each with "title" and optional "description" and "priority"
+
+    Returns:
+        Dictionary containing the created todos
+    """
+    created = await backend.create_todos(todos)
+
+    return {
+        "count": len(created),
+        "todos": created
+    }
 
 @mcp.tool
-async def get_todo_stats() -> Dict:
+async def update_todos(updates: List[Dict]) -> Dict:
+    """
+    Update many todo items in one request
+
+    Args:
+        updates: List of updates, each with "id" and any of "title", "description",
+            "completed" and "priority"
+
+    Returns:
+        Dictionary containing the updated todos
+    """
+    updated = await backend.update_todos(updates)
+
+    return {
+        "count": len(updated),
+        "todos": updated
+    }
+
+@mcp.tool
+async def complete_todos(todo_ids: List[int]) -> Dict:
+    """
+    Mark many todos as completed in one request
+
+    Args:
+        todo_ids: IDs of the todos to complete
+
+    Returns:
+        Dictionary containing the updated todos
+    """
+    updated = await backend.update_todos([
+        {"id": todo_id, "completed": True} for todo_id in todo_ids
+    ])
+
+    return {
+        "count": len(updated),
+        "todos": updated
+    }
+
+@mcp.tool
+async def delete_todos(todo_ids: List[int]) -> Dict:
+    """
+    Delete many todo items in one request
+
+    Args:
+        todo_ids: IDs of the todos to delete
+
+    Returns:
+        Confirmation message
+    """
+    deleted = await backend.delete_todos(todo_ids)
+
+    return {"message": f"{deleted} todos deleted successfully"}
+
+@mcp.tool(annotations=READ_ONLY)
+async def get_todo_stats(format: ResultFormat = "json") -> Dict:
     """
     Get statistics about todos
 
+    Args:
+        format: "json" (nested object), or "columnar" / "tsv" for one flat
+            row with pending_by_priority spread into pending_<priority>
+
     Returns:
         Dictionary with todo statistics
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{TODO_API_BASE}/todos/stats/summary")
-        response.raise_for_status()
+    stats = await backend.get_stats()
+    if format == "json":
+        return stats
+    return format_rows([flatten_stats(stats)], format, key="stats")
 
-    return response.json()
+@mcp.tool(annotations=READ_ONLY)
+async def get_todo_overview(limit: Annotated[int, Field(ge=1, le=50)] = 5) -> Dict:
+    """
+    Get todo statistics, the completion rate and the next pending todos of
+    each priority in one call
 
-@mcp.tool
+    Use this instead of get_todo_stats, calculate_completion_rate and
+    get_todos per priority when asked how things stand or what to do next.
+
+    Args:
+        limit: Pending todos to return per priority (1-50)
+
+    Returns:
+        Dictionary with total, completed, pending, pending_by_priority,
+        completion_rate and top_pending (high/medium/low lists of todos)
+    """
+    return await backend.get_overview(limit)
+
+@mcp.tool(annotations=READ_ONLY)
+async def get_todo_changes(since: ChangeSeq = 0, limit: PageLimit = 100) -> Dict:
+    """
+    Get todos inserted, updated or deleted since a change sequence number
+
+    Args:
+        since: last_seq from a previous call; 0 fetches the whole change log
+            if none of it has been pruned
+        limit: Maximum number of changes to return (1-1000)
+
+    Returns:
+        Dictionary with changes (seq, op, todo_id, changed_at, current todo or
+        None if deleted), last_seq to pass as since next time, and has_more.
+        Fails if changes after since have been pruned; the error names the
+        seq to continue from after re-reading todos with get_todos.
+    """
+    page = await backend.list_changes(since, limit)
+    return {"count": len(page["changes"]), **page}
+
+# Todos included in the export resources; GET /todos/export itself has no cap
+TODO_EXPORT_RESOURCE_MAX_ROWS = int(os.getenv("TODO_EXPORT_RESOURCE_MAX_ROWS", "10000"))
+
+@mcp.resource("todos://export.ndjson", mime_type="application/x-ndjson")
+async def export_todos_ndjson() -> str:
+    """
+    Todos in id order as NDJSON, one JSON object per line, up to
+    TODO_EXPORT_RESOURCE_MAX_ROWS rows
+    """
+    return await backend.export_todos({"format": "ndjson", "limit": TODO_EXPORT_RESOURCE_MAX_ROWS})
+
+@mcp.resource("todos://export.csv", mime_type="text/csv")
+async def export_todos_csv() -> str:
+    """
+    Todos in id order as CSV with a header row, up to
+    TODO_EXPORT_RESOURCE_MAX_ROWS rows
+    """
+    return await backend.export_todos({"format": "csv", "limit": TODO_EXPORT_RESOURCE_MAX_ROWS})
+
+@mcp.tool(annotations=READ_ONLY)
+def get_cache_stats() -> Dict:
+    """
+    Get hit/miss counters for the server's tool result cache
+
+    Returns:
+        Dictionary with cache hits, misses, hit rate, invalidations and size
+    """
+    return tool_cache.cache.stats()
+
+@mcp.tool(annotations=READ_ONLY)
+def get_server_metrics() -> Dict:
+    """
+    Get call counts, error rates and latency for every tool and backend call
+
+    Returns:
+        Dictionary with per-tool latency (mean, p50/p95/p99, with backend
+        vs local time), per-backend-operation latency and cache stats
+    """
+    return {**tool_metrics.summary(), "cache": tool_cache.cache.stats()}
+
+@mcp.tool(annotations=READ_ONLY)
 def calculate_completion_rate(total: int, completed: int) -> Dict:
     """
     Calculate the completion rate of todos
@@ -1,45 +1,253 @@
 #!/usr/bin/env python3
 """
-HTTP wrapper for FastMCP server
-Runs the Todo MCP server over HTTP/SSE transport instead of STDIO
+HTTP gateway for the Todo MCP server
+Serves the FastMCP streamable-HTTP app at /mcp with per-tool concurrency
+limits. Runs stateless by default so any uvicorn worker can serve any
+request
+
+Usage:
+    python mcp_server_http.py
+    uvicorn mcp_server_http:app --host 0.0.0.0 --port 8001 --workers 4
 """
 
-import sys
 import asyncio
-from fastapi import FastAPI
-from sse_starlette.sse import EventSourceResponse
-import json
-from mcp import ClientSession, Resource, Tool
-from mcp.server import Server
-from mcp.server.stdio import StdioServerTransport
+from collections import Counter
 from contextlib import asynccontextmanager
-import httpx
+import json
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+import anyio
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
 
-# Import the MCP server instance
+from backends import shared_http_client
 from mcp_server import mcp
 
-app = FastAPI()
+# Server settings
+TODO_MCP_HOST = os.getenv("TODO_MCP_HOST", "0.0.0.0")
+TODO_MCP_PORT = int(os.getenv("TODO_MCP_PORT", "8001"))
+TODO_MCP_WORKERS = int(os.getenv("TODO_MCP_WORKERS", "1"))
+
+# Stateless mode keeps no session between requests, so requests can land on
+# any worker; it also turns off server-to-client notifications, which the
+# Todo tools do not use. JSON responses skip the per-call SSE stream.
+TODO_MCP_STATELESS = os.getenv("TODO_MCP_STATELESS", "1") == "1"
+TODO_MCP_JSON_RESPONSE = os.getenv("TODO_MCP_JSON_RESPONSE", "1") == "1"
+
+# Concurrent calls allowed per tool and worker, with per-tool overrides
+# such as "search_todos=8,create_todos=4"
+TODO_MCP_MAX_CONCURRENT_CALLS = int(os.getenv("TODO_MCP_MAX_CONCURRENT_CALLS", "32"))
+TODO_MCP_TOOL_LIMITS = os.getenv("TODO_MCP_TOOL_LIMITS", "")
+
+# How long a call waits for a free slot before it is rejected, and the retry_after sent with it
+TODO_MCP_QUEUE_TIMEOUT = float(os.getenv("TODO_MCP_QUEUE_TIMEOUT", "0.1"))
+TODO_MCP_RETRY_AFTER = float(os.getenv("TODO_MCP_RETRY_AFTER", "1"))
+
+class ClosedStreamFilter(logging.Filter):
+    """
+    Drop the SDK's "Error in message router" ClosedResourceError record
 
-# Global server instance
-server = None
+    In stateless JSON-response mode the router logs it after every response,
+    once the per-request transport has already been closed.
+    """
 
-@app.get("/health")
-async def health():
-    return {"status": "healthy"}
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not (record.exc_info and isinstance(record.exc_info[1], anyio.ClosedResourceError))
 
-@app.post("/mcp/invoke")
-async def invoke_tool(request: dict):
-    """Invoke a tool via the MCP server"""
-    tool_name = request.get("tool")
-    arguments = request.get("arguments", {})
-    
-    # Call the tool directly from the mcp instance
+logging.getLogger("mcp.server.streamable_http").addFilter(ClosedStreamFilter())
+
+def parse_tool_limits(value: str) -> Dict[str, int]:
+    """Parse "tool=limit,tool=limit" into a dict"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        tool, _, limit = item.partition("=")
+        limits[tool.strip()] = int(limit)
+    return limits
+
+def tool_call(body: bytes) -> Tuple[Optional[str], object]:
+    """Return (tool name, JSON-RPC id) if body is a tools/call request, else (None, None)"""
     try:
-        result = await mcp._handle_tool_call(tool_name, arguments)
-        return {"result": result}
-    except Exception as e:
-        return {"error": str(e)}
+        message = json.loads(body)
+    except ValueError:
+        return None, None
+    if not isinstance(message, dict) or message.get("method") != "tools/call":
+        return None, None
+    params = message.get("params")
+    name = params.get("name") if isinstance(params, dict) else None
+    return (name if isinstance(name, str) else None), message.get("id")
+
+class ToolConcurrencyLimiter:
+    """
+    ASGI middleware capping concurrent calls per MCP tool
+
+    Peeks at each POSTed JSON-RPC message; a tools/call waits up to
+    queue_timeout for a slot on its tool's semaphore and is otherwise
+    answered with a JSON-RPC error carrying retry_after. The error goes
+    out as a normal 200 response: MCP clients treat an HTTP error status
+    as a broken transport and drop the connection. The slot is held until
+    the response has been sent. Limits apply per worker.
+
+    Only tools registered on the server get a semaphore; calls naming any
+    other tool pass through and FastMCP answers them as unknown.
+    """
+
+    def __init__(
+        self,
+        app,
+        server=mcp,
+        default_limit: int = TODO_MCP_MAX_CONCURRENT_CALLS,
+        limits: Optional[Dict[str, int]] = None,
+        queue_timeout: float = TODO_MCP_QUEUE_TIMEOUT,
+        retry_after: float = TODO_MCP_RETRY_AFTER
+    ):
+        self.app = app
+        self.server = server
+        self.default_limit = default_limit
+        self.limits = limits if limits is not None else parse_tool_limits(TODO_MCP_TOOL_LIMITS)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphores: Optional[Dict[str, asyncio.Semaphore]] = None
+        self.in_flight = Counter()
+        self.rejected = Counter()
+        limiters.append(self)
+
+    def limit(self, tool: str) -> int:
+        return self.limits.get(tool, self.default_limit)
+
+    async def _semaphore(self, tool: str) -> Optional[asyncio.Semaphore]:
+        """The tool's semaphore, or None if no such tool is registered"""
+        if self._semaphores is None:
+            tools = await self.server.get_tools()
+            if self._semaphores is None:
+                self._semaphores = {name: asyncio.Semaphore(self.limit(name)) for name in tools}
+        return self._semaphores.get(tool)
+
+    async def _acquire(self, semaphore: asyncio.Semaphore) -> bool:
+        if not semaphore.locked():
+            await semaphore.acquire()
+            return True
+        if self.queue_timeout <= 0:
+            return False
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _reject(self, send, tool: str, request_id):
+        body = json.dumps({
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {
+                "code": -32000,
+                "message": f"Too many concurrent calls to {tool}; retry after {self.retry_after:g}s",
+                "data": {"tool": tool, "limit": self.limit(tool), "retry_after": self.retry_after},
+            },
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+
+        # Buffer the body to peek at it, then replay it to the app
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        tool, request_id = tool_call(body)
+        semaphore = await self._semaphore(tool) if tool is not None else None
+        if semaphore is None:
+            return await self.app(scope, replay, send)
+
+        if not await self._acquire(semaphore):
+            self.rejected[tool] += 1
+            return await self._reject(send, tool, request_id)
+
+        self.in_flight[tool] += 1
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            self.in_flight[tool] -= 1
+            semaphore.release()
+
+# Limiter instances, so /health can report them (Starlette builds them lazily)
+limiters = []
+
+async def health(request: Request) -> JSONResponse:
+    """Liveness plus this worker's per-tool in-flight and rejected counts"""
+    tools = {}
+    for limiter in limiters:
+        for tool in set(limiter.in_flight) | set(limiter.rejected):
+            tools[tool] = {
+                "limit": limiter.limit(tool),
+                "in_flight": limiter.in_flight[tool],
+                "rejected": limiter.rejected[tool],
+            }
+    return JSONResponse({"status": "healthy", "pid": os.getpid(), "tools": tools})
+
+mcp_app = mcp.http_app(
+    path="/mcp",
+    json_response=TODO_MCP_JSON_RESPONSE,
+    stateless_http=TODO_MCP_STATELESS,
+    middleware=[Middleware(ToolConcurrencyLimiter)]
+)
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    """
+    Run the MCP session manager and hold the shared HTTP client
+
+    The MCP server lifespan runs per session, which in stateless mode is
+    per request; holding the client here keeps one keep-alive pool for the
+    life of the worker.
+    """
+    async with shared_http_client():
+        async with mcp_app.lifespan(app):
+            yield
+
+app = Starlette(
+    routes=[
+        Route("/health", health),
+        Mount("/", app=mcp_app),
+    ],
+    lifespan=lifespan
+)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+
+    # Multiple workers need an import string so each process builds its own app
+    uvicorn.run(
+        "mcp_server_http:app",
+        host=TODO_MCP_HOST,
+        port=TODO_MCP_PORT,
+        workers=TODO_MCP_WORKERS
+    )
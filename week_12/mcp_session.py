@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Shared MCP client sessions
+A small pool of long-lived fastmcp sessions to the HTTP server that
+reconnects when the server goes away, caches list_tools, and a synchronous
+facade for scripts. Used by mcp_client.py, mcp_client_fixed.py and
+test_mcp_connection.py.
+
+Usage:
+    async with McpSessionPool() as pool:
+        result = await pool.call_tool("get_todo_stats")
+
+    with SyncMcpClient() as client:
+        print(client.call_tool("get_todo_stats").data)
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import anyio
+import httpx
+import mcp.types
+from fastmcp import Client
+
+# MCP Server URL (when running in HTTP mode)
+MCP_SERVER_URL = os.getenv("TODO_MCP_URL", "http://localhost:8001/mcp")
+
+# Sessions kept open per pool, and the per-request timeout in seconds
+TODO_MCP_POOL_SIZE = int(os.getenv("TODO_MCP_POOL_SIZE", "2"))
+TODO_MCP_CLIENT_TIMEOUT = float(os.getenv("TODO_MCP_CLIENT_TIMEOUT", "30"))
+
+# How often a call in flight checks that its session is still connected
+SESSION_POLL_INTERVAL = 0.05
+
+# Errors that mean the session is gone rather than that a call failed
+CONNECTION_ERRORS = (
+    httpx.TransportError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    ConnectionError,
+)
+
+class McpSessionPool:
+    """
+    Long-lived MCP sessions shared by many calls
+
+    Sessions open on first use and stay open until close(). Each call goes
+    to the session with the fewest calls in flight; a session that fails
+    with a connection error is reopened. The call is then retried once if
+    it cannot have changed anything twice: list_tools, or a tool the server
+    annotates readOnlyHint or idempotentHint. Other tool calls re-raise,
+    since the server may already have run them. The
+    call_tool and list_tools signatures match fastmcp.Client, so a pool can
+    be passed wherever a connected client is expected.
+    """
+
+    def __init__(
+        self,
+        url: str = MCP_SERVER_URL,
+        size: int = TODO_MCP_POOL_SIZE,
+        timeout: float = TODO_MCP_CLIENT_TIMEOUT
+    ):
+        self.url = url
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._clients: List[Optional[Client]] = [None] * self.size
+        self._in_flight = [0] * self.size
+        self._locks = [asyncio.Lock() for _ in range(self.size)]
+        self._tools: Optional[List[mcp.types.Tool]] = None
+        self.reconnects = 0
+
+    async def _session(self, slot: int) -> Client:
+        """The connected client in slot, opening it if needed"""
+        client = self._clients[slot]
+        if client is not None and client.is_connected():
+            return client
+        async with self._locks[slot]:
+            client = self._clients[slot]
+            if client is None or not client.is_connected():
+                if client is not None:
+                    await self._discard(client)
+                    self.reconnects += 1
+                client = Client(self.url, timeout=self.timeout)
+                await client.__aenter__()
+                self._clients[slot] = client
+            return client
+
+    async def _discard(self, client: Client):
+        try:
+            await client.close()
+        except Exception:
+            pass
+
+    async def _reset(self, slot: int, client: Client):
+        """Close slot's session if it is still client, so the next call reopens it"""
+        async with self._locks[slot]:
+            if self._clients[slot] is client:
+                self._clients[slot] = None
+                await self._discard(client)
+                self.reconnects += 1
+
+    async def _invoke(self, client: Client, method: str, *args, **kwargs):
+        """
+        Run one client call, failing as soon as the session itself dies
+
+        When the server goes away fastmcp closes the session at once, but a
+        request already sent waits for its full timeout. Checking
+        is_connected() while the call runs turns that wait into an
+        immediate ConnectionError.
+        """
+        call = asyncio.ensure_future(getattr(client, method)(*args, **kwargs))
+        try:
+            while not call.done():
+                if not client.is_connected():
+                    call.cancel()
+                    raise ConnectionError(f"MCP session to {self.url} closed")
+                await asyncio.wait({call}, timeout=SESSION_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        return call.result()
+
+    async def _retryable(self, method: str, *args) -> bool:
+        """Whether a call that lost its session may safely be sent again"""
+        if method != "call_tool":
+            return True
+        try:
+            tools = await self.list_tools()
+        except (*CONNECTION_ERRORS, RuntimeError):
+            return False
+        for tool in tools:
+            if tool.name == args[0]:
+                hints = tool.annotations
+                return bool(hints and (hints.readOnlyHint or hints.idempotentHint))
+        return False
+
+    async def _call(self, method: str, *args, **kwargs):
+        slot = min(range(self.size), key=self._in_flight.__getitem__)
+        self._in_flight[slot] += 1
+        try:
+            for attempt in (1, 2):
+                client = await self._session(slot)
+                try:
+                    return await self._invoke(client, method, *args, **kwargs)
+                except (*CONNECTION_ERRORS, RuntimeError) as e:
+                    # fastmcp reports a dead session as RuntimeError("... not connected")
+                    if isinstance(e, RuntimeError) and client.is_connected():
+                        raise
+                    await self._reset(slot, client)
+                    if attempt == 2 or not await self._retryable(method, *args):
+                        raise
+        finally:
+            self._in_flight[slot] -= 1
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, **kwargs):
+        """Call a tool; returns fastmcp's CallToolResult (use .data for the value)"""
+        return await self._call("call_tool", name, arguments or {}, **kwargs)
+
+    async def list_tools(self, refresh: bool = False) -> List[mcp.types.Tool]:
+        """The server's tools with their input and output schemas, fetched once"""
+        if self._tools is None or refresh:
+            self._tools = await self._call("list_tools")
+        return self._tools
+
+    async def tool_schema(self, name: str) -> Dict:
+        """The JSON schema of a tool's arguments; KeyError if there is no such tool"""
+        for tool in await self.list_tools():
+            if tool.name == name:
+                return tool.inputSchema
+        raise KeyError(name)
+
+    async def close(self):
+        for slot, client in enumerate(self._clients):
+            if client is not None:
+                self._clients[slot] = None
+                await self._discard(client)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+class SyncMcpClient:
+    """
+    Blocking facade over McpSessionPool for scripts
+
+    Runs the pool on an event loop in a background thread, so its sessions
+    stay open between calls instead of being set up for every asyncio.run().
+    """
+
+    def __init__(self, url: str = MCP_SERVER_URL, size: int = 1, timeout: float = TODO_MCP_CLIENT_TIMEOUT):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-session", daemon=True)
+        self._thread.start()
+        self.pool = McpSessionPool(url, size, timeout)
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, **kwargs):
+        return self._run(self.pool.call_tool(name, arguments, **kwargs))
+
+    def list_tools(self, refresh: bool = False) -> List[mcp.types.Tool]:
+        return self._run(self.pool.list_tools(refresh))
+
+    def tool_schema(self, name: str) -> Dict:
+        return self._run(self.pool.tool_schema(name))
+
+    def close(self):
+        if not self._loop.is_running():
+            return
+        try:
+            self._run(self.pool.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
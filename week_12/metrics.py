@@ -0,0 +1,132 @@
+"""
+In-process latency metrics with Prometheus text output
+
+Shared by the MCP server and the FastAPI app. A LatencyMetric is a family
+of histograms keyed by label values; each also counts errors and keeps a
+window of recent samples for percentiles.
+"""
+
+from collections import deque
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class LatencyStats:
+    """Histogram, error count and recent samples for one label set"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = 1000):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds: float, error: bool = False):
+        self.count += 1
+        self.total += seconds
+        if error:
+            self.errors += 1
+        self.recent.append(seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def summary(self) -> Dict:
+        """Counts plus mean and p50/p95/p99 over the recent window, in milliseconds"""
+        samples = sorted(self.recent)
+
+        def percentile(fraction: float) -> float:
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": self.errors / self.count if self.count else 0.0,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": samples[-1] * 1000 if samples else 0.0,
+        }
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    rendered = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return f"{{{rendered}}}" if rendered else ""
+
+class LatencyMetric:
+    """A family of LatencyStats keyed by label values, safe to share across threads"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        count_errors: bool = True
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self.count_errors = count_errors
+        self._series: Dict[Tuple[str, ...], LatencyStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Sequence[str], seconds: float, error: bool = False):
+        key = tuple(labels)
+        with self._lock:
+            stats = self._series.get(key)
+            if stats is None:
+                stats = self._series[key] = LatencyStats(self.buckets)
+            stats.observe(seconds, error)
+
+    def summary(self) -> Dict[str, Dict]:
+        """Summaries keyed by label values joined with "." """
+        with self._lock:
+            return {".".join(key): stats.summary() for key, stats in sorted(self._series.items())}
+
+    def render(self) -> List[str]:
+        """Prometheus histogram lines plus, if counting errors, a *_errors_total counter"""
+        # todo_api_request_duration_seconds -> todo_api_request_errors_total
+        base = self.name.removesuffix("_seconds").removesuffix("_duration")
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} histogram",
+        ]
+        errors = [
+            f"# HELP {base}_errors_total Errors counted by {self.name}",
+            f"# TYPE {base}_errors_total counter",
+        ]
+        with self._lock:
+            for key, stats in sorted(self._series.items()):
+                pairs = list(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, count in zip(stats.buckets, stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', repr(bound))])} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', '+Inf')])} {stats.count}")
+                lines.append(f"{self.name}_sum{_format_labels(pairs)} {stats.total}")
+                lines.append(f"{self.name}_count{_format_labels(pairs)} {stats.count}")
+                errors.append(f"{base}_errors_total{_format_labels(pairs)} {stats.errors}")
+        return lines + errors if self.count_errors else lines
+
+def render_counter(name: str, help: str, value: float, kind: str = "counter") -> List[str]:
+    """Prometheus lines for a single unlabeled counter or gauge"""
+    return [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+def render_prometheus(metrics: Iterable[LatencyMetric], extra_lines: Iterable[str] = ()) -> str:
+    """Prometheus text exposition for metrics plus any pre-rendered lines"""
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,589 @@
+"""
+Repository layer for Todo data access
+Shared by the FastAPI routes and the MCP server's direct backend
+"""
+
+from sqlalchemy import column, delete, func, insert, literal_column, select, table, text, tuple_, union_all, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import base64
+import json
+import os
+import re
+
+from database import Todo, TodoChange, TodoCounter, TodoVersion
+from schemas import TodoCreate, TodoUpdate, TodoResponse, TodoBulkUpdateItem
+
+# Where get_stats reads from: "counters" (O(1) table) or "aggregate" (grouped scan)
+STATS_SOURCE = os.getenv("TODO_STATS_SOURCE", "counters")
+
+class TodosNotFoundError(LookupError):
+    """Raised by bulk operations when some of the requested todos do not exist"""
+
+    def __init__(self, ids: List[int]):
+        self.ids = ids
+        super().__init__(f"Todos not found: {ids}")
+
+class ChangesPrunedError(LookupError):
+    """Raised by list_changes when changes after since are no longer in the log"""
+
+    def __init__(self, since: int, pruned_through: int, latest_seq: int):
+        self.since = since
+        self.pruned_through = pruned_through
+        self.latest_seq = latest_seq
+        super().__init__(
+            f"Changes after seq {since} have been pruned; the log is complete only after seq "
+            f"{pruned_through}. Re-read the todos, then continue with since={latest_seq}"
+        )
+
+# Columns in TodoResponse field order, so tuple rows serialize identically
+TODO_COLUMNS = ("title", "description", "priority", "id", "completed", "created_at", "updated_at")
+
+def serialize_todo(todo: Todo) -> Dict:
+    """Convert a Todo row to the same JSON-ready dict the API returns"""
+    return TodoResponse.model_validate(todo).model_dump(mode="json")
+
+def row_to_dict(row, columns: Tuple[str, ...] = TODO_COLUMNS) -> Dict:
+    """
+    Convert a column tuple to a JSON-ready dict without Pydantic validation
+
+    Produces the same output as serialize_todo for the selected columns.
+    """
+    todo = dict(zip(columns, row))
+    for field in ("created_at", "updated_at"):
+        if todo.get(field) is not None:
+            todo[field] = todo[field].isoformat()
+    return todo
+
+def encode_cursor(todo: Todo, order_by: str = "id") -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    key = {"order_by": order_by, "id": todo.id}
+    if order_by == "created_at":
+        key["created_at"] = todo.created_at.isoformat()
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, order_by: str = "id") -> Dict:
+    """Decode a cursor from encode_cursor, raising ValueError if it is invalid"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(key, dict) or key.get("order_by") != order_by:
+        raise ValueError(f"Cursor is not valid for order_by={order_by!r}")
+
+    try:
+        key["id"] = int(key["id"])
+        if order_by == "created_at":
+            key["created_at"] = datetime.fromisoformat(key["created_at"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    return key
+
+def list_todos(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    after_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    order_by: str = "id"
+) -> Tuple[List[Todo], Optional[str]]:
+    """
+    List one page of todos with optional filters
+
+    Pages are ordered by id, or by (created_at, id). Pass the returned
+    next_cursor back as cursor (or the last id as after_id) for keyset
+    pagination, which costs the same at any depth; skip still works for
+    offset pagination. next_cursor is None on the last page.
+    """
+    query = build_list_query(
+        db,
+        skip=skip,
+        limit=limit + 1,  # One extra row tells us whether another page exists
+        completed=completed,
+        priority=priority,
+        after_id=after_id,
+        cursor=cursor,
+        order_by=order_by
+    )
+    todos = query.all()
+    if len(todos) <= limit:
+        return todos, None
+
+    todos = todos[:limit]
+    return todos, encode_cursor(todos[-1], order_by)
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated fields= value into TodoResponse columns
+
+    Returns all columns when fields is empty; raises ValueError on unknown names.
+    """
+    if not fields:
+        return TODO_COLUMNS
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(TODO_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {sorted(unknown)}; choose from {list(TODO_COLUMNS)}")
+    return tuple(column for column in TODO_COLUMNS if column in requested)
+
+def list_todo_rows(db: Session, fields: Optional[str] = None, **filters) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Fast path for list_todos that returns JSON-ready dicts
+
+    Selects plain column tuples instead of ORM objects and builds dicts
+    directly, skipping identity-map bookkeeping and per-row validation.
+    fields (comma-separated) limits both the SELECT and the output to the
+    named columns. Accepts the same keyword arguments as list_todos.
+    """
+    output = parse_fields(fields)
+    limit = filters.pop("limit", 100)
+    order_by = filters.get("order_by", "id")
+
+    # The cursor needs the sort key even when it is not returned
+    sort_keys = ("created_at", "id") if order_by == "created_at" else ("id",)
+    columns = output + tuple(key for key in sort_keys if key not in output)
+    query = build_list_query(db, limit=limit + 1, columns=columns, **filters)
+
+    rows = query.all()
+    next_cursor = encode_cursor(rows[limit - 1], order_by) if len(rows) > limit else None
+    return [row_to_dict(row[:len(output)], output) for row in rows[:limit]], next_cursor
+
+def build_list_query(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    after_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    columns: Optional[Tuple[str, ...]] = None
+):
+    """
+    Build the filtered, ordered and limited query behind list_todos
+
+    Selects Todo objects, or only the named columns as tuples.
+    """
+    if skip and (cursor or after_id is not None):
+        raise ValueError("skip cannot be combined with cursor or after_id")
+
+    if columns:
+        query = db.query(*[getattr(Todo, column) for column in columns])
+    else:
+        query = db.query(Todo)
+
+    if completed is not None:
+        query = query.filter(Todo.completed == completed)
+
+    if priority:
+        query = query.filter(Todo.priority == priority)
+
+    key = decode_cursor(cursor, order_by) if cursor else None
+    if order_by == "created_at":
+        if key:
+            query = query.filter(tuple_(Todo.created_at, Todo.id) > (key["created_at"], key["id"]))
+        query = query.order_by(Todo.created_at, Todo.id)
+    else:
+        if key:
+            after_id = key["id"]
+        if after_id is not None:
+            query = query.filter(Todo.id > after_id)
+        query = query.order_by(Todo.id)
+
+    return query.offset(skip).limit(limit)
+
+# Rows fetched from the cursor per export batch
+EXPORT_BATCH_SIZE = int(os.getenv("TODO_EXPORT_BATCH_SIZE", "1000"))
+
+def iter_todo_batches(
+    db: Session,
+    columns: Tuple[str, ...] = TODO_COLUMNS,
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    limit: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[List[Tuple]]:
+    """
+    Yield every matching todo in id order as lists of column tuples
+
+    Runs one SELECT and fetches it batch_size rows at a time (yield_per), so
+    memory stays at one batch however many rows match and the whole export
+    reads a single snapshot. The session stays in use until the iterator is
+    exhausted or closed.
+    """
+    query = build_list_query(db, limit=limit, completed=completed, priority=priority, columns=columns)
+    result = db.execute(query.statement, execution_options={"yield_per": batch_size})
+    for rows in result.partitions():
+        yield rows
+
+# The FTS5 index maintained by triggers on todos (see database.TODOS_FTS)
+todos_fts = table("todos_fts", column("rowid"), column("rank"))
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 MATCH expression
+
+    Every word must match; words are quoted so FTS5 operators and
+    punctuation in user input are searched for literally. Raises
+    ValueError if query has no searchable words.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        raise ValueError("Search query must contain at least one word")
+    return " ".join(f'"{word}"' for word in words)
+
+def search_todos(
+    db: Session,
+    query: str,
+    limit: int = 20,
+    skip: int = 0,
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    fields: Optional[str] = None,
+    order_by: str = "rank"
+) -> List[Dict]:
+    """
+    Search todo titles and descriptions, best matches first
+
+    Matches whole words (with stemming, so "running" finds "run") through
+    the todos_fts index. order_by="rank" sorts with bm25, weighting title
+    matches above description matches; it scores every match, so words
+    found in much of the table are slow. order_by="id" returns matches in
+    id order straight off the index. Returns JSON-ready dicts like
+    list_todo_rows.
+    """
+    if order_by not in ("rank", "id"):
+        raise ValueError(f"Unknown order_by {order_by!r}, expected 'rank' or 'id'")
+
+    output = parse_fields(fields)
+    statement = (
+        select(*[getattr(Todo, name) for name in output])
+        .join(todos_fts, todos_fts.c.rowid == Todo.id)
+        .where(literal_column("todos_fts").op("MATCH")(build_match_query(query)))
+    )
+    if completed is not None:
+        statement = statement.where(Todo.completed == completed)
+    if priority:
+        statement = statement.where(Todo.priority == priority)
+    sort_key = todos_fts.c.rank if order_by == "rank" else todos_fts.c.rowid
+    statement = statement.order_by(sort_key).offset(skip).limit(limit)
+
+    return [row_to_dict(row, output) for row in db.execute(statement)]
+
+def get_version(db: Session) -> int:
+    """Get the table-level change version, bumped on every write to todos"""
+    return db.scalar(select(TodoVersion.version).where(TodoVersion.id == 1)) or 0
+
+def get_todo(db: Session, todo_id: int) -> Optional[Todo]:
+    """Get a todo by ID, or None if it does not exist"""
+    return db.query(Todo).filter(Todo.id == todo_id).first()
+
+def create_todo(db: Session, todo: TodoCreate) -> Todo:
+    """Create a new todo with a single INSERT ... RETURNING"""
+    now = datetime.utcnow()
+    db_todo = db.scalars(
+        insert(Todo)
+        .values(
+            title=todo.title,
+            description=todo.description,
+            priority=todo.priority,
+            completed=False,
+            created_at=now,
+            updated_at=now
+        )
+        .returning(Todo)
+    ).one()
+    db.commit()
+    return db_todo
+
+def _update_returning(db: Session, todo_id: int, values: Dict) -> Optional[Todo]:
+    """Run one UPDATE ... RETURNING for a todo, or return None if it does not exist"""
+    values["updated_at"] = datetime.utcnow()
+    todo = db.scalars(
+        update(Todo)
+        .where(Todo.id == todo_id)
+        .values(**values)
+        .returning(Todo)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    ).one_or_none()
+    db.commit()
+    return todo
+
+def update_todo(db: Session, todo_id: int, todo_update: TodoUpdate) -> Optional[Todo]:
+    """Apply the fields set on todo_update, or return None if the todo does not exist"""
+    return _update_returning(db, todo_id, todo_update.model_dump(exclude_unset=True))
+
+def delete_todo(db: Session, todo_id: int) -> bool:
+    """Delete a todo, returning False if it does not exist"""
+    result = db.execute(
+        delete(Todo).where(Todo.id == todo_id).execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def complete_todo(db: Session, todo_id: int) -> Optional[Todo]:
+    """Mark a todo as completed, or return None if it does not exist"""
+    return _update_returning(db, todo_id, {"completed": True})
+
+def _missing_ids(db: Session, ids: Iterable[int]) -> List[int]:
+    """Return the ids that have no matching todo"""
+    wanted = set(ids)
+    found = set(db.scalars(select(Todo.id).where(Todo.id.in_(wanted))))
+    return sorted(wanted - found)
+
+def create_todos(db: Session, todos: List[TodoCreate]) -> List[Dict]:
+    """Create many todos with one multi-row INSERT ... RETURNING in one transaction"""
+    now = datetime.utcnow()
+    rows = [
+        {
+            "title": todo.title,
+            "description": todo.description,
+            "priority": todo.priority,
+            "completed": False,
+            "created_at": now,
+            "updated_at": now
+        }
+        for todo in todos
+    ]
+    # SQLite hands out rowids in VALUES order within the batch, so sorting
+    # by id restores request order without the row-at-a-time fallback
+    created = sorted(db.scalars(insert(Todo).returning(Todo), rows).all(), key=lambda todo: todo.id)
+
+    # Serialize before commit, which would expire every loaded row
+    result = [serialize_todo(todo) for todo in created]
+    db.commit()
+    return result
+
+def update_todos(db: Session, updates: List[TodoBulkUpdateItem]) -> List[Dict]:
+    """
+    Apply many partial updates in one transaction
+
+    Rows are written with executemany UPDATEs keyed by primary key. If any
+    id does not exist nothing is changed and TodosNotFoundError is raised.
+    """
+    missing = _missing_ids(db, (item.id for item in updates))
+    if missing:
+        raise TodosNotFoundError(missing)
+
+    now = datetime.utcnow()
+    rows = [
+        {**item.model_dump(exclude_unset=True), "id": item.id, "updated_at": now}
+        for item in updates
+    ]
+    db.execute(update(Todo), rows)
+
+    ids = sorted({item.id for item in updates})
+    updated = db.scalars(select(Todo).where(Todo.id.in_(ids)).order_by(Todo.id)).all()
+    result = [serialize_todo(todo) for todo in updated]
+    db.commit()
+    return result
+
+def delete_todos(db: Session, ids: List[int]) -> int:
+    """
+    Delete many todos with a single DELETE
+
+    If any id does not exist nothing is deleted and TodosNotFoundError is
+    raised. Returns the number of deleted todos.
+    """
+    wanted = set(ids)
+    result = db.execute(
+        delete(Todo).where(Todo.id.in_(wanted)).execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(wanted):
+        db.rollback()
+        raise TodosNotFoundError(_missing_ids(db, wanted))
+
+    db.commit()
+    return result.rowcount
+
+def _stats_from_counts(counts: Iterable[Tuple[bool, str, int]]) -> Dict:
+    """Build the stats response from (completed, priority, count) rows"""
+    total = 0
+    completed = 0
+    pending_by_priority = {"high": 0, "medium": 0, "low": 0}
+
+    for is_completed, priority, count in counts:
+        total += count
+        if is_completed:
+            completed += count
+        elif priority in pending_by_priority:
+            pending_by_priority[priority] += count
+
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "pending_by_priority": pending_by_priority
+    }
+
+def get_stats_aggregate(db: Session) -> Dict:
+    """Get todo statistics with one grouped scan over todos"""
+    counts = (
+        db.query(Todo.completed, Todo.priority, func.count())
+        .group_by(Todo.completed, Todo.priority)
+        .all()
+    )
+    return _stats_from_counts(counts)
+
+def get_stats_counters(db: Session) -> Dict:
+    """Get todo statistics from the trigger-maintained todo_counters table"""
+    counts = db.query(TodoCounter.completed, TodoCounter.priority, TodoCounter.count).all()
+    return _stats_from_counts(counts)
+
+def get_stats(db: Session) -> Dict:
+    """Get todo statistics from the source selected by TODO_STATS_SOURCE"""
+    if STATS_SOURCE == "aggregate":
+        return get_stats_aggregate(db)
+    return get_stats_counters(db)
+
+PRIORITIES = ("high", "medium", "low")
+
+def build_top_pending_query(limit: int = 5):
+    """
+    One UNION ALL of per-priority "first limit pending todos" queries
+
+    Each branch is an index range scan on ix_todos_completed_priority_id
+    that stops after limit rows.
+    """
+    columns = [getattr(Todo, name) for name in TODO_COLUMNS]
+    return union_all(*[
+        select(*columns)
+        .where(Todo.completed.is_(False), Todo.priority == priority)
+        .order_by(Todo.id)
+        .limit(limit)
+        .subquery()
+        .select()
+        for priority in PRIORITIES
+    ])
+
+def list_top_pending(db: Session, limit: int = 5) -> Dict[str, List[Dict]]:
+    """Get the first limit pending todos of each priority, keyed by priority"""
+    top_pending = {priority: [] for priority in PRIORITIES}
+    for row in db.execute(build_top_pending_query(limit)):
+        todo = row_to_dict(row)
+        top_pending[todo["priority"]].append(todo)
+    return top_pending
+
+def get_overview(db: Session, limit: int = 5) -> Dict:
+    """
+    Get stats, completion rate and the top pending todos per priority
+
+    Answers the usual "how am I doing and what is next" question with two
+    indexed reads: the stats and one list_top_pending query.
+    """
+    stats = get_stats(db)
+    rate = stats["completed"] / stats["total"] * 100 if stats["total"] else 0
+    return {
+        **stats,
+        "completion_rate": f"{rate:.1f}%",
+        "top_pending": list_top_pending(db, limit),
+    }
+
+# Change log retention, applied by prune_changes (0 disables either limit)
+TODO_CHANGES_MAX_ROWS = int(os.getenv("TODO_CHANGES_MAX_ROWS", "100000"))
+TODO_CHANGES_MAX_AGE_DAYS = float(os.getenv("TODO_CHANGES_MAX_AGE_DAYS", "7"))
+
+# Rows deleted per transaction while pruning, so writers are not held up
+PRUNE_BATCH_SIZE = 10000
+
+def _last_issued_seq(db: Session) -> int:
+    """The highest seq ever handed out, including pruned ones"""
+    return db.scalar(text("SELECT seq FROM sqlite_sequence WHERE name = 'todo_changes'")) or 0
+
+def get_changes_pruned_through(db: Session) -> int:
+    """
+    The seq after which the change log is complete
+
+    Pruning only removes the oldest rows, so this is one below the oldest
+    row still kept, or the last seq handed out once the log is empty.
+    """
+    oldest = db.scalar(select(func.min(TodoChange.seq)))
+    return oldest - 1 if oldest is not None else _last_issued_seq(db)
+
+def get_latest_change_seq(db: Session) -> int:
+    """Get the seq a new client should follow from: the newest change, or 0 if nothing has changed yet"""
+    latest = db.scalar(select(func.max(TodoChange.seq)))
+    return latest if latest is not None else _last_issued_seq(db)
+
+def list_changes(db: Session, since: int = 0, limit: int = 100) -> Dict:
+    """
+    List todo mutations with seq greater than since, oldest first
+
+    Each change carries the todo's current row (None once it is deleted),
+    so replaying a page brings a client's copy up to date. Pass last_seq
+    back as since to fetch the next page; has_more says whether to.
+    Raises ChangesPrunedError when changes after since have been pruned.
+    """
+    rows = db.execute(
+        select(TodoChange.seq, TodoChange.op, TodoChange.todo_id, TodoChange.changed_at,
+               *[getattr(Todo, column) for column in TODO_COLUMNS])
+        .outerjoin(Todo, Todo.id == TodoChange.todo_id)
+        .where(TodoChange.seq > since)
+        .order_by(TodoChange.seq)
+        .limit(limit + 1)
+    ).all()
+
+    # seq has no gaps except where the log was pruned, so a page that starts
+    # right after since cannot have missed anything
+    if not rows or rows[0][0] != since + 1:
+        pruned_through = get_changes_pruned_through(db)
+        if since < pruned_through:
+            raise ChangesPrunedError(since, pruned_through, get_latest_change_seq(db))
+
+    changes = [
+        {
+            "seq": seq,
+            "op": op,
+            "todo_id": todo_id,
+            "changed_at": changed_at.isoformat(),
+            "todo": row_to_dict(todo) if todo[TODO_COLUMNS.index("id")] is not None else None
+        }
+        for seq, op, todo_id, changed_at, *todo in rows[:limit]
+    ]
+    return {
+        "changes": changes,
+        "last_seq": changes[-1]["seq"] if changes else since,
+        "has_more": len(rows) > limit
+    }
+
+def prune_changes(
+    db: Session,
+    max_rows: int = TODO_CHANGES_MAX_ROWS,
+    max_age_days: float = TODO_CHANGES_MAX_AGE_DAYS
+) -> int:
+    """
+    Delete the oldest change log rows beyond max_rows or older than max_age_days
+
+    Only a prefix of the log is ever removed, so clients whose since is
+    still in the log are unaffected; older ones get ChangesPrunedError.
+    Returns the number of rows deleted.
+    """
+    latest = db.scalar(select(func.max(TodoChange.seq)))
+    if latest is None:
+        return 0
+
+    prune_through = 0
+    if max_rows > 0:
+        prune_through = latest - max_rows
+    if max_age_days > 0:
+        # seq and changed_at grow together, so the first recent row bounds the old ones
+        cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+        first_recent = db.scalar(
+            select(TodoChange.seq).where(TodoChange.changed_at >= cutoff).order_by(TodoChange.seq).limit(1)
+        )
+        prune_through = max(prune_through, latest if first_recent is None else first_recent - 1)
+
+    deleted = 0
+    start = get_changes_pruned_through(db)
+    while start < prune_through:
+        end = min(start + PRUNE_BATCH_SIZE, prune_through)
+        deleted += db.execute(delete(TodoChange).where(TodoChange.seq <= end)).rowcount
+        db.commit()
+        start = end
+    return deleted
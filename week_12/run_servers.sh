@@ -14,8 +14,8 @@ if [[ "$OSTYPE" == "darwin"* ]]; then
     echo "Starting FastAPI server..."
     osascript -e 'tell app "Terminal" to do script "cd '$(pwd)' && source .venv/bin/activate && python main.py"'
 
-    echo "Starting MCP server (HTTP mode)..."
-    osascript -e 'tell app "Terminal" to do script "cd '$(pwd)' && source .venv/bin/activate && fastmcp run mcp_server.py:mcp --transport http --port 8001"'
+    echo "Starting MCP HTTP gateway..."
+    osascript -e 'tell app "Terminal" to do script "cd '$(pwd)' && source .venv/bin/activate && python mcp_server_http.py"'
 
     echo ""
     echo "Servers are starting in separate terminal windows..."
@@ -35,8 +35,8 @@ else
 
     sleep 2
 
-    echo "Starting MCP server in background (HTTP mode)..."
-    fastmcp run mcp_server.py:mcp --transport http --port 8001 &
+    echo "Starting MCP HTTP gateway in background..."
+    python mcp_server_http.py &
     MCP_PID=$!
 
     echo ""
@@ -4,7 +4,10 @@ Pydantic schemas for request/response validation
 
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+# Largest batch accepted by the bulk endpoints
+MAX_BULK_ITEMS = 1000
 
 # Base schema for Todo
 class TodoBase(BaseModel):
@@ -31,4 +34,20 @@ class TodoResponse(TodoBase):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Schema for creating many Todos in one request
+class TodoBulkCreate(BaseModel):
+    todos: List[TodoCreate] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+# Schema for one entry of a bulk update
+class TodoBulkUpdateItem(TodoUpdate):
+    id: int
+
+# Schema for updating many Todos in one request
+class TodoBulkUpdate(BaseModel):
+    updates: List[TodoBulkUpdateItem] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+# Schema for deleting many Todos in one request
+class TodoBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 """
 Seed script to populate the database with sample todo items
+
+Usage:
+    python seed_data.py                      # Replace todos with SAMPLE_TODOS
+    python seed_data.py --generate 1000000   # Replace todos with generated ones
+    python seed_data.py --generate 1000000 --append
 """
 
 from sqlalchemy.orm import Session
-from database import SessionLocal, Todo, engine, Base
+from database import (
+    SessionLocal, Todo, engine, Base, TRIGGERS, rebuild_counters
+)
 from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+import argparse
 import random
+import time
 
 # Sample todo data
 SAMPLE_TODOS = [
@@ -102,6 +112,205 @@ SAMPLE_TODOS = [
     }
 ]
 
+def make_todo_row(todo_data: Dict, rng=random) -> Dict:
+    """Build an insertable row with a created date in the last 30 days"""
+    # Create random creation dates within the last 30 days
+    days_ago = rng.randint(0, 30)
+    created_date = datetime.utcnow() - timedelta(days=days_ago)
+
+    # If completed, set a random completion date after creation
+    updated_date = created_date
+    if todo_data["completed"]:
+        days_to_complete = rng.randint(1, min(7, days_ago)) if days_ago > 0 else 0
+        updated_date = created_date + timedelta(days=days_to_complete)
+
+    return {
+        "title": todo_data["title"],
+        "description": todo_data["description"],
+        "priority": todo_data["priority"],
+        "completed": todo_data["completed"],
+        "created_at": created_date,
+        "updated_at": updated_date
+    }
+
+# Vocabulary for generated todos
+GENERATED_VERBS = [
+    "Review", "Write", "Fix", "Update", "Schedule", "Plan", "Prepare", "Call", "Email", "Send",
+    "Refactor", "Test", "Deploy", "Document", "Investigate", "Clean up", "Book", "Pay", "Renew", "Order",
+]
+GENERATED_OBJECTS = [
+    "project documentation", "pull requests", "CI/CD pipeline", "authentication module", "unit tests",
+    "dependencies", "database queries", "team meeting", "caching strategy", "payment module",
+    "backup strategy", "dashboard UI", "security audit", "monitoring alerts", "quarterly report",
+    "client invoice", "dentist appointment", "car insurance", "flight tickets", "grocery list",
+    "release notes", "onboarding guide", "budget spreadsheet", "conference talk", "API rate limits",
+]
+GENERATED_CONTEXTS = [
+    "", "", "", " for the Q3 release", " before Friday", " with the design team", " for the new client",
+    " after the incident", " for the mobile app", " next week", " (follow-up)", " for staging",
+]
+GENERATED_SENTENCES = [
+    "Check with the team before starting.",
+    "Blocked until the review is done.",
+    "See the notes from last week's meeting.",
+    "This came up in the retrospective.",
+    "Make sure the database backup runs first.",
+    "Customers have reported this twice already.",
+    "Keep the change small and easy to roll back.",
+    "Needs sign-off from security.",
+    "Add tests that cover the edge cases.",
+    "Update the documentation when finished.",
+    "Low effort, but easy to forget.",
+    "Coordinate with operations for the deployment window.",
+    "Estimate is about two hours.",
+    "Link the ticket in the pull request description.",
+    "Draft is in the shared folder.",
+]
+
+# Skewed distributions: most todos are medium priority, few are high
+GENERATED_PRIORITIES = ["low", "medium", "high"]
+GENERATED_PRIORITY_WEIGHTS = [0.3, 0.55, 0.15]
+
+def generate_todo_rows(
+    count: int,
+    chunk_size: int = 50000,
+    seed: int = 0,
+    days: int = 365
+) -> Iterator[List[Tuple]]:
+    """
+    Yield chunks of realistic generated todo rows
+
+    Rows are (title, description, completed, priority, created_at,
+    updated_at) tuples with the dates as Unix timestamps. created_at is
+    spread over the last days days, weighted towards recent dates. Older
+    todos are more likely to be completed. Descriptions are missing, one
+    sentence or several.
+    """
+    rng = random.Random(seed)
+    now = time.time()
+    span = days * 86400.0
+
+    # Text is drawn from pools built once, so each row costs a few lookups
+    titles = [
+        f"{verb} {obj}{context}"
+        for verb in GENERATED_VERBS for obj in GENERATED_OBJECTS for context in GENERATED_CONTEXTS
+    ]
+    descriptions = [None] * 300 + [
+        " ".join(rng.sample(GENERATED_SENTENCES, k=min(len(GENERATED_SENTENCES), int(rng.expovariate(0.5)) + 1)))
+        for _ in range(1700)
+    ]
+
+    random_ = rng.random
+    expovariate = rng.expovariate
+    title_count = len(titles)
+    description_count = len(descriptions)
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        priorities = rng.choices(GENERATED_PRIORITIES, GENERATED_PRIORITY_WEIGHTS, k=size)
+        rows = []
+        for priority in priorities:
+            # Squaring a uniform sample puts more todos in the recent past
+            age = span * random_() ** 2
+            created_at = now - age
+            completed = random_() < 0.15 + 0.7 * age / span
+            if completed:
+                # Completed a few days after creation, and never in the future
+                updated_at = created_at + min(age, expovariate(1 / 259200))
+            else:
+                updated_at = created_at
+            rows.append((
+                titles[int(random_() * title_count)],
+                descriptions[int(random_() * description_count)],
+                completed,
+                priority,
+                created_at,
+                updated_at,
+            ))
+        yield rows
+
+# Formats a Unix timestamp the way SQLAlchemy stores DateTime in SQLite,
+# so dates are built in C rather than per row in Python
+TIMESTAMP_SQL = "strftime('%Y-%m-%d %H:%M:%f', ?, 'unixepoch') || '000'"
+
+def bulk_load_todos(
+    count: int,
+    chunk_size: int = 50000,
+    seed: int = 0,
+    days: int = 365,
+    append: bool = False
+) -> Dict:
+    """
+    Load count generated todos in one transaction
+
+    The per-row triggers and the indexes on todos are dropped for the load
+    and recreated afterwards. Counters, the search index, the table version and the
+    change log are then brought up to date with one set-based statement
+    each. Without append, existing todos are deleted first. Returns row
+    counts and timings.
+
+    A replacing load does not log a delete and an insert per todo. It empties
+    the change log and moves its start past every seq handed out so far, so
+    every change-feed client is told to re-read the todos.
+    """
+    timings = {}
+    with engine.begin() as conn:
+        for name in TRIGGERS:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+        start = time.perf_counter()
+        if not append:
+            # sqlite_sequence holds the last seq AUTOINCREMENT handed out
+            last_seq = conn.exec_driver_sql(
+                "SELECT IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'todo_changes'), 0)"
+            ).scalar()
+            conn.exec_driver_sql("DELETE FROM todo_changes")
+            conn.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'todo_changes'")
+            conn.exec_driver_sql(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('todo_changes', ?)",
+                (last_seq + 1,)
+            )
+            conn.exec_driver_sql("DELETE FROM todos")
+            conn.exec_driver_sql("INSERT INTO todos_fts (todos_fts) VALUES ('delete-all')")
+        first_id = conn.exec_driver_sql("SELECT IFNULL(MAX(id), 0) + 1 FROM todos").scalar()
+        timings["clear_seconds"] = time.perf_counter() - start
+
+        # Building each index once after the load beats updating it per row
+        start = time.perf_counter()
+        for index in Todo.__table__.indexes:
+            index.drop(conn)
+        for rows in generate_todo_rows(count, chunk_size=chunk_size, seed=seed, days=days):
+            conn.exec_driver_sql(
+                "INSERT INTO todos (title, description, completed, priority, created_at, updated_at) "
+                f"VALUES (?, ?, ?, ?, {TIMESTAMP_SQL}, {TIMESTAMP_SQL})",
+                rows
+            )
+        for index in Todo.__table__.indexes:
+            index.create(conn)
+        timings["insert_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rebuild_counters(conn)
+        conn.exec_driver_sql(
+            "INSERT INTO todos_fts (rowid, title, description) "
+            "SELECT id, title, description FROM todos WHERE id >= ?",
+            (first_id,)
+        )
+        if append:
+            conn.exec_driver_sql(
+                "INSERT INTO todo_changes (todo_id, op) SELECT id, 'insert' FROM todos WHERE id >= ?",
+                (first_id,)
+            )
+        conn.exec_driver_sql("UPDATE todo_version SET version = version + 1 WHERE id = 1")
+        for ddl in TRIGGERS.values():
+            conn.exec_driver_sql(ddl)
+        timings["rebuild_seconds"] = time.perf_counter() - start
+
+    return {"rows": count, **timings}
+
+def seed_todos(count: int, chunk_size: int = 50000, seed: int = 0) -> int:
+    """Replace all todos with count generated ones; returns count"""
+    return bulk_load_todos(count, chunk_size=chunk_size, seed=seed)["rows"]
+
 def seed_database():
     """Seed the database with sample todo items"""
 
@@ -116,25 +325,7 @@ def seed_database():
 
         # Add sample todos
         for i, todo_data in enumerate(SAMPLE_TODOS):
-            # Create random creation dates within the last 30 days
-            days_ago = random.randint(0, 30)
-            created_date = datetime.utcnow() - timedelta(days=days_ago)
-
-            # If completed, set a random completion date after creation
-            updated_date = created_date
-            if todo_data["completed"]:
-                days_to_complete = random.randint(1, min(7, days_ago)) if days_ago > 0 else 0
-                updated_date = created_date + timedelta(days=days_to_complete)
-
-            todo = Todo(
-                title=todo_data["title"],
-                description=todo_data["description"],
-                priority=todo_data["priority"],
-                completed=todo_data["completed"],
-                created_at=created_date,
-                updated_at=updated_date
-            )
-            db.add(todo)
+            db.add(Todo(**make_todo_row(todo_data)))
             print(f"Added todo {i+1}: {todo_data['title']}")
 
         # Commit all changes
@@ -162,12 +353,32 @@ def seed_database():
     finally:
         db.close()
 
+def generate_database(count: int, chunk_size: int, seed: int, days: int, append: bool):
+    """Load generated todos and report throughput"""
+    result = bulk_load_todos(count, chunk_size=chunk_size, seed=seed, days=days, append=append)
+    total = result["clear_seconds"] + result["insert_seconds"] + result["rebuild_seconds"]
+    print(f"Inserted {count} todos in {result['insert_seconds']:.1f}s "
+          f"({count / result['insert_seconds']:,.0f} rows/sec)")
+    print(f"Rebuilt counters, search index and change log in {result['rebuild_seconds']:.1f}s")
+    print(f"Total {total:.1f}s ({count / total:,.0f} rows/sec end to end)")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--generate", type=int, metavar="N", help="Load N generated todos instead of SAMPLE_TODOS")
+    parser.add_argument("--append", action="store_true", help="Keep existing todos when generating")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per executemany batch")
+    parser.add_argument("--days", type=int, default=365, help="Spread created_at over this many days")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for generated data")
+    args = parser.parse_args()
+
     # Ensure tables exist
     Base.metadata.create_all(bind=engine)
 
-    # Run the seed function
-    seed_database()
+    if args.generate:
+        generate_database(args.generate, args.chunk_size, args.seed, args.days, args.append)
+    else:
+        # Run the seed function
+        seed_database()
 
     print("\nDatabase seeding complete!")
-    print("You can now start the FastAPI server with: uvicorn main:app --reload")
\ No newline at end of file
+    print("You can now start the FastAPI server with: uvicorn main:app --reload")
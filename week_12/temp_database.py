@@ -0,0 +1,50 @@
+"""
+Throwaway SQLite databases for the benchmark scripts
+
+temporary_database() points TODO_DATABASE_URL at a file in a new
+temporary directory for the length of a with block and deletes the
+directory afterwards. database.py reads the URL when it is imported, so
+anything that imports it has to run inside the block.
+"""
+
+import atexit
+from contextlib import ExitStack, contextmanager
+import os
+import tempfile
+from typing import Iterator, Optional
+
+@contextmanager
+def temporary_database(name: str, url: Optional[str] = None) -> Iterator[str]:
+    """
+    Set TODO_DATABASE_URL for the block and yield it
+
+    Without url the database is todo-<name>-*/<name>.db under the system
+    temp directory, removed on exit along with its WAL files. A given url
+    (such as --database-url) is used as it is and left in place. The
+    previous TODO_DATABASE_URL is restored either way.
+    """
+    previous = os.environ.get("TODO_DATABASE_URL")
+    with ExitStack() as stack:
+        if url is None:
+            tmpdir = stack.enter_context(tempfile.TemporaryDirectory(prefix=f"todo-{name}-"))
+            url = f"sqlite:///{tmpdir}/{name}.db"
+        os.environ["TODO_DATABASE_URL"] = url
+        try:
+            yield url
+        finally:
+            if previous is None:
+                os.environ.pop("TODO_DATABASE_URL", None)
+            else:
+                os.environ["TODO_DATABASE_URL"] = previous
+
+def use_temporary_database(name: str) -> str:
+    """
+    Enter temporary_database until the process exits
+
+    For scripts that import database.py at module level. An existing
+    TODO_DATABASE_URL is kept, as os.environ.setdefault would.
+    """
+    stack = ExitStack()
+    url = stack.enter_context(temporary_database(name, os.getenv("TODO_DATABASE_URL")))
+    atexit.register(stack.close)
+    return url
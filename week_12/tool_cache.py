@@ -0,0 +1,107 @@
+"""
+Read-through cache for MCP tool results
+
+Caches the results of read-only tools keyed by tool name and normalized
+arguments, bounded by a TTL and an LRU size limit. Any call to a write
+tool on the same server clears the cache.
+"""
+
+from collections import OrderedDict
+import json
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+class TTLCache:
+    """LRU cache whose entries also expire after ttl seconds"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped by every clear, so a caller can tell whether one happened
+        self.generation = 0
+
+    def get(self, key) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.invalidations += 1
+        self.generation += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": f"{(self.hits / lookups * 100) if lookups else 0:.1f}%",
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+        }
+
+def cache_key(tool_name: str, arguments: Optional[Dict]) -> Tuple[str, str]:
+    """Key a call by tool name and its arguments, ignoring order and None values"""
+    normalized = {key: value for key, value in (arguments or {}).items() if value is not None}
+    return tool_name, json.dumps(normalized, sort_keys=True, default=str)
+
+class ToolCacheMiddleware(Middleware):
+    """Serve repeated read-only tool calls from a TTLCache"""
+
+    def __init__(
+        self,
+        cached_tools: Iterable[str],
+        invalidating_tools: Iterable[str],
+        maxsize: int = 256,
+        ttl: float = 5.0
+    ):
+        self.cached_tools = set(cached_tools)
+        self.invalidating_tools = set(invalidating_tools)
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        name = context.message.name
+
+        if name in self.invalidating_tools:
+            try:
+                return await call_next(context)
+            finally:
+                # Clear even on failure: a batch may have partly applied
+                self.cache.clear()
+
+        if name not in self.cached_tools:
+            return await call_next(context)
+
+        key = cache_key(name, context.message.arguments)
+        result = self.cache.get(key)
+        if result is None:
+            generation = self.cache.generation
+            result = await call_next(context)
+            # A write finished while this read ran, so the result may predate it
+            if self.cache.generation == generation:
+                self.cache.set(key, result)
+        return result
@@ -0,0 +1,108 @@
+"""
+Per-tool latency and error metrics for the MCP server
+
+ToolMetricsMiddleware times every tool call. InstrumentedBackend wraps
+the Todo backend and times each backend call (the HTTP round trip or the
+database call), so a tool's time splits into backend and local work.
+"""
+
+from contextvars import ContextVar
+import functools
+import inspect
+import time
+from typing import Dict, Optional
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+from metrics import LatencyMetric, render_counter, render_prometheus
+
+# Backend seconds spent by the tool call running in this context
+_backend_seconds: ContextVar[Optional[list]] = ContextVar("backend_seconds", default=None)
+
+class ToolMetricsMiddleware(Middleware):
+    """Record call counts, errors and latency for every tool call"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.tool_latency = LatencyMetric(
+            "todo_mcp_tool_duration_seconds", "MCP tool call latency", ["tool"]
+        )
+        self.tool_backend_latency = LatencyMetric(
+            "todo_mcp_tool_backend_duration_seconds", "Time each MCP tool call spent in backend calls", ["tool"],
+            count_errors=False
+        )
+        self.backend_latency = LatencyMetric(
+            "todo_mcp_backend_duration_seconds", "Todo backend call latency", ["backend", "operation"]
+        )
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        backend_seconds = [0.0]
+        token = _backend_seconds.set(backend_seconds)
+        start = time.perf_counter()
+        error = False
+        try:
+            return await call_next(context)
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            _backend_seconds.reset(token)
+            name = context.message.name
+            self.tool_latency.observe((name,), elapsed, error)
+            self.tool_backend_latency.observe((name,), backend_seconds[0], error)
+
+    def observe_backend(self, backend: str, operation: str, seconds: float, error: bool):
+        self.backend_latency.observe((backend, operation), seconds, error)
+        backend_seconds = _backend_seconds.get()
+        if backend_seconds is not None:
+            backend_seconds[0] += seconds
+
+    def summary(self) -> Dict:
+        """Per-tool and per-backend-operation summaries"""
+        tools = self.tool_latency.summary()
+        backend_by_tool = self.tool_backend_latency.summary()
+        for name, stats in tools.items():
+            backend_ms = backend_by_tool.get(name, {}).get("mean_ms", 0.0)
+            stats["backend_mean_ms"] = backend_ms
+            stats["local_mean_ms"] = max(0.0, stats["mean_ms"] - backend_ms)
+        return {
+            "uptime_seconds": time.time() - self.started_at,
+            "tools": tools,
+            "backend": self.backend_latency.summary(),
+        }
+
+    def render(self, extra_lines=()) -> str:
+        """Prometheus text exposition of all tool and backend metrics"""
+        return render_prometheus(
+            [self.tool_latency, self.tool_backend_latency, self.backend_latency],
+            [*render_counter("todo_mcp_uptime_seconds", "Seconds since the server started",
+                             time.time() - self.started_at, kind="gauge"), *extra_lines]
+        )
+
+class InstrumentedBackend:
+    """Proxy a Todo backend, timing every coroutine method it exposes"""
+
+    def __init__(self, backend, tool_metrics: ToolMetricsMiddleware):
+        self._backend = backend
+        self._metrics = tool_metrics
+        self.name = backend.name
+
+    def __getattr__(self, operation: str):
+        method = getattr(self._backend, operation)
+        if not inspect.iscoroutinefunction(method):
+            return method
+
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            error = False
+            try:
+                return await method(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                self._metrics.observe_backend(self.name, operation, time.perf_counter() - start, error)
+
+        return timed